@@ -2,8 +2,10 @@ from core.entities.account import Account
 from core.entities.inventory import Inventory
 from core.entities.order import TradeSide, OrderStatus, OrderType, SpotOrder
 from core.entities.order_book import OrderBook
+from core.entities.array_order_book import ArrayOrderBook
 from core.entities.pair import Pair
 from core.entities.price_state import PriceCandles, Tickers
+from core.entities.candle_builder import CandleBuilder
 from core.entities.token import Token
 from core.entities.market_info import MarketInfo
 
@@ -11,9 +13,10 @@ __all__ = [
     'Account',
     'Inventory',
     'TradeSide', 'OrderStatus', 'OrderType', 'SpotOrder',
-    'OrderBook',
+    'OrderBook', 'ArrayOrderBook',
     'Pair',
     'PriceCandles', 'Tickers',
+    'CandleBuilder',
     'Token',
     'MarketInfo'
 ]
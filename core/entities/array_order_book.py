@@ -0,0 +1,217 @@
+import datetime
+
+import numpy as np
+
+from core.entities.book_analytics import DepthAnalytics
+
+
+def _is_sorted(prices: np.ndarray, descending: bool):
+    steps = np.diff(prices)
+    return not np.any(steps > 0) if descending else not np.any(steps < 0)
+
+
+def _parse_levels(levels, descending: bool):
+    """Write exchange [price, size] levels straight into a preallocated (2, n) float64 buffer.
+    Args:
+        levels (List): [price, size] levels, values as str or float.
+        descending (bool): True for bids.
+    Returns:
+        buffer (np.ndarray): row 0 prices, row 1 sizes, best price first.
+    """
+    buffer = np.empty((2, len(levels)), dtype=np.float64)
+    if len(levels) > 0:
+        buffer.T[:] = levels
+        if not _is_sorted(buffer[0], descending):
+            order = np.argsort(buffer[0])
+            if descending:
+                order = order[::-1]
+            buffer = np.ascontiguousarray(buffer[:, order])
+    return buffer
+
+
+def _read_only(array: np.ndarray):
+    array.flags.writeable = False
+    return array
+
+
+class _LazyLevels:
+    """One side of a snapshot, raw levels converted to float64 only as deep as they are read.
+
+    Exchanges send levels best first, so the parsed prefix is the top of the
+    book. It grows by doubling, an unsorted prefix falls back to a full sort.
+    """
+
+    _MIN_PARSE = 8
+
+    def __init__(self, levels, descending: bool):
+        self._levels = levels
+        self._descending = descending
+        self._buffer = np.empty((2, 0), dtype=np.float64)
+        self._cum_sizes = None
+
+    @classmethod
+    def from_array(cls, array: np.ndarray, descending: bool):
+        side = cls(None, descending)
+        side._buffer = _read_only(array)
+        return side
+
+    def __len__(self):
+        if self._levels is None:
+            return self._buffer.shape[1]
+        return len(self._levels)
+
+    def _parse(self, n: int):
+        parsed = self._buffer.shape[1]
+        buffer = np.empty((2, n), dtype=np.float64)
+        buffer[:, :parsed] = self._buffer
+        buffer.T[parsed:] = self._levels[parsed:n]
+        if _is_sorted(buffer[0, max(parsed - 1, 0):], self._descending):
+            self._buffer = _read_only(buffer)
+        else:
+            self._buffer = _read_only(_parse_levels(self._levels, self._descending))
+        if self._buffer.shape[1] == len(self._levels):
+            self._levels = None  # Fully parsed, the raw levels are no longer needed
+
+    def top(self, n: int):
+        """(2, k) array of the best k = min(n, len) levels."""
+        n = min(n, len(self))
+        if n > self._buffer.shape[1]:
+            self._parse(min(max(n, 2 * self._buffer.shape[1], self._MIN_PARSE), len(self)))
+        return self._buffer[:, :n]
+
+    def all(self):
+        return self.top(len(self))
+
+    def cum_sizes(self):
+        if self._cum_sizes is None:
+            self._cum_sizes = _read_only(np.cumsum(self.all()[1]))
+        return self._cum_sizes
+
+
+class ArrayOrderBook(DepthAnalytics):
+    """Orderbook snapshot stored as contiguous float64 arrays per side.
+
+    Levels are parsed lazily from the top, so reading the best few levels
+    costs the same whatever the depth of the snapshot. Full depth arrays and
+    cumulative sizes are built on first access and handed out as read-only views.
+    """
+
+    def __init__(self, bids: np.ndarray,
+                 asks: np.ndarray,
+                 timestamp: datetime.datetime.timestamp,
+                 sequence: int = None):
+        """
+        Args:
+            bids (np.ndarray): (2, n) array, row 0 prices descending, row 1 sizes.
+            asks (np.ndarray): (2, n) array, row 0 prices ascending, row 1 sizes.
+        """
+        self._bids = _LazyLevels.from_array(bids, descending=True)
+        self._asks = _LazyLevels.from_array(asks, descending=False)
+        self._timestamp = timestamp
+        self._sequence = sequence
+
+    @classmethod
+    def from_levels(cls, bids, asks,
+                    timestamp: datetime.datetime.timestamp,
+                    sequence: int = None):
+        """Build a book from raw exchange levels, parsed on access.
+        Args:
+            bids (List): [price, size] bid levels, values as str or float.
+            asks (List): [price, size] ask levels, values as str or float.
+            timestamp (float): snapshot timestamp.
+        Returns:
+            ArrayOrderBook.
+        """
+        book = cls.__new__(cls)
+        book._bids = _LazyLevels(bids, descending=True)
+        book._asks = _LazyLevels(asks, descending=False)
+        book._timestamp = timestamp
+        book._sequence = sequence
+        return book
+
+    @property
+    def bids(self):
+        """(n, 2) view of [price, size] bid levels, best first."""
+        return self._bids.all().T
+
+    @property
+    def asks(self):
+        """(n, 2) view of [price, size] ask levels, best first."""
+        return self._asks.all().T
+
+    @property
+    def bid_prices(self):
+        return self._bids.all()[0]
+
+    @property
+    def bid_sizes(self):
+        return self._bids.all()[1]
+
+    @property
+    def bid_cum_sizes(self):
+        return self._bids.cum_sizes()
+
+    @property
+    def ask_prices(self):
+        return self._asks.all()[0]
+
+    @property
+    def ask_sizes(self):
+        return self._asks.all()[1]
+
+    @property
+    def ask_cum_sizes(self):
+        return self._asks.cum_sizes()
+
+    @property
+    def timestamp(self):
+        return self._timestamp
+
+    @property
+    def sequence(self):
+        return self._sequence
+
+    def top_bids(self, n: int):
+        """(k, 2) view of the best k = min(n, depth) bid levels, only those are parsed."""
+        return self._bids.top(n).T
+
+    def top_asks(self, n: int):
+        """(k, 2) view of the best k = min(n, depth) ask levels, only those are parsed."""
+        return self._asks.top(n).T
+
+    def copy(self):
+        """Snapshots are immutable, return the book itself."""
+        return self
+
+    @property
+    def get_best_bid(self):
+        if len(self._bids) > 0:
+            return float(self._bids.top(1)[0, 0])
+        else:
+            return None
+
+    @property
+    def get_best_ask(self):
+        if len(self._asks) > 0:
+            return float(self._asks.top(1)[0, 0])
+        else:
+            return None
+
+    def get_nth_best_bid(self, n):
+        if len(self._bids) > 0:
+            return float(self._bids.top(n + 1)[0, -1])
+        else:
+            return None
+
+    def get_nth_best_ask(self, n):
+        if len(self._asks) > 0:
+            return float(self._asks.top(n + 1)[0, -1])
+        else:
+            return None
+
+    @property
+    def get_mid_price(self):
+        if self.get_best_ask is not None and self.get_best_bid is not None:
+            return (self.get_best_ask + self.get_best_bid) / 2
+        else:
+            return None
@@ -0,0 +1,109 @@
+import numpy as np
+
+
+def _levels_within(prices: np.ndarray, limit: float, descending: bool):
+    """Number of levels priced at or better than limit."""
+    if descending:
+        return len(prices) - np.searchsorted(prices[::-1], limit, side='left')
+    return np.searchsorted(prices, limit, side='right')
+
+
+def _volume_within(cum_sizes: np.ndarray, n_levels: int):
+    return float(cum_sizes[n_levels - 1]) if n_levels > 0 else 0.0
+
+
+def _vwap(prices: np.ndarray, sizes: np.ndarray, cum_sizes: np.ndarray, quantity: float):
+    """Average price of taking quantity from one side, None if the side is too thin."""
+    if quantity <= 0 or len(cum_sizes) < 1 or cum_sizes[-1] < quantity:
+        return None
+    k = np.searchsorted(cum_sizes, quantity, side='left')
+    filled = float(cum_sizes[k - 1]) if k > 0 else 0.0
+    notional = float(np.dot(prices[:k], sizes[:k])) + float(prices[k]) * (quantity - filled)
+    return notional / quantity
+
+
+def _price_at_depth(prices: np.ndarray, cum_sizes: np.ndarray, quantity: float):
+    if len(cum_sizes) < 1 or cum_sizes[-1] < quantity:
+        return None
+    return float(prices[np.searchsorted(cum_sizes, quantity, side='left')])
+
+
+class DepthAnalytics:
+    """Depth analytics shared by orderbook representations.
+
+    Subclasses expose bid_prices, bid_sizes, bid_cum_sizes, ask_prices,
+    ask_sizes and ask_cum_sizes as float64 arrays, best level first, and
+    top_bids / top_asks for the best n [price, size] levels only.
+    All lookups are binary searches on the cumulative size arrays.
+    """
+
+    def volume_within(self, p_threshold: float):
+        """
+        Get the volume quoted within a percentage of the mid price.
+
+        Args:
+            p_threshold (float): distance from mid, 0.01 for 1%.
+        Returns:
+            bid_volume (float), ask_volume (float): base volume on each side.
+        """
+        mid_price = self.get_mid_price
+        if mid_price is None:
+            return 0.0, 0.0
+        n_bids = _levels_within(self.bid_prices, mid_price * (1 - p_threshold), descending=True)
+        n_asks = _levels_within(self.ask_prices, mid_price * (1 + p_threshold), descending=False)
+        return _volume_within(self.bid_cum_sizes, n_bids), _volume_within(self.ask_cum_sizes, n_asks)
+
+    def bid_vwap(self, quantity: float):
+        """Average price of selling quantity into the bids, None if the book is too thin."""
+        return _vwap(self.bid_prices, self.bid_sizes, self.bid_cum_sizes, quantity)
+
+    def ask_vwap(self, quantity: float):
+        """Average price of buying quantity from the asks, None if the book is too thin."""
+        return _vwap(self.ask_prices, self.ask_sizes, self.ask_cum_sizes, quantity)
+
+    def bid_slippage(self, quantity: float):
+        """Relative cost versus mid of selling quantity into the bids."""
+        vwap = self.bid_vwap(quantity)
+        mid_price = self.get_mid_price
+        if vwap is None or mid_price is None:
+            return None
+        return (mid_price - vwap) / mid_price
+
+    def ask_slippage(self, quantity: float):
+        """Relative cost versus mid of buying quantity from the asks."""
+        vwap = self.ask_vwap(quantity)
+        mid_price = self.get_mid_price
+        if vwap is None or mid_price is None:
+            return None
+        return (vwap - mid_price) / mid_price
+
+    def bid_price_at_depth(self, quantity: float):
+        """Price of the bid level where cumulative size reaches quantity."""
+        return _price_at_depth(self.bid_prices, self.bid_cum_sizes, quantity)
+
+    def ask_price_at_depth(self, quantity: float):
+        """Price of the ask level where cumulative size reaches quantity."""
+        return _price_at_depth(self.ask_prices, self.ask_cum_sizes, quantity)
+
+    @property
+    def microprice(self):
+        """Top of book mid price weighted by the opposite side size."""
+        top_bids, top_asks = self.top_bids(1), self.top_asks(1)
+        if len(top_bids) < 1 or len(top_asks) < 1:
+            return None
+        bid, bid_size = map(float, top_bids[0])
+        ask, ask_size = map(float, top_asks[0])
+        return (bid * ask_size + ask * bid_size) / (bid_size + ask_size)
+
+    def imbalance(self, n_levels: int = 1):
+        """
+        Get the order book imbalance over the top levels.
+
+        Returns:
+            imbalance (float): (bid - ask) / (bid + ask) volume, between -1 and 1.
+        """
+        bid_volume = float(sum(size for _, size in self.top_bids(n_levels)))
+        ask_volume = float(sum(size for _, size in self.top_asks(n_levels)))
+        if bid_volume + ask_volume <= 0:
+            return None
+        return (bid_volume - ask_volume) / (bid_volume + ask_volume)
@@ -0,0 +1,74 @@
+from typing import List, Sequence
+
+from core.entities.price_state import PriceCandles, Tickers, CandleHistory
+
+PERIOD_SECONDS = {'M1': 60, 'M3': 180, 'M5': 300, 'M15': 900, 'M30': 1800,
+                  'H1': 3600, 'H4': 14400, 'D1': 86400, 'D7': 604800}
+
+
+class CandleBuilder:
+    """Builds candles of several periods locally from trades or tickers.
+
+    Each period keeps its own CandleHistory whose last row is the candle still
+    being built. History is seeded once from REST with `add_candle`.
+    """
+
+    def __init__(self, periods: Sequence[str], capacity: int):
+        self._histories = {period: CandleHistory(capacity, period) for period in periods}
+        self._last_ticker_volume = None
+
+    @property
+    def periods(self):
+        return tuple(self._histories)
+
+    def history(self, period: str) -> CandleHistory:
+        return self._histories[period]
+
+    def current(self, period: str) -> PriceCandles:
+        history = self._histories[period]
+        if len(history) > 0:
+            return history[-1]
+        else:
+            return None
+
+    def add_candle(self, candle: PriceCandles):
+        """Insert or refresh a complete candle, e.g. from REST backfill. Older candles are ignored."""
+        history = self._histories.get(candle.period)
+        if history is None:
+            return
+        row = (candle.timestamp, candle.open, candle.high, candle.low, candle.close, candle.volume)
+        if len(history) > 0:
+            last_timestamp = float(history.column('timestamp', 1)[0])
+            if candle.timestamp == last_timestamp:
+                history.update_last(row)
+                return
+            elif candle.timestamp < last_timestamp:
+                return
+        history.append(row)
+
+    def add_candles(self, candles: List[PriceCandles]):
+        for candle in candles:
+            self.add_candle(candle)
+
+    def add_trade(self, timestamp: float, price: float, quantity: float):
+        """Fold a trade into the open candle of every period."""
+        for period, history in self._histories.items():
+            seconds = PERIOD_SECONDS[period]
+            start = timestamp - timestamp % seconds
+            if len(history) > 0:
+                last_timestamp, open_, high, low, _, volume = history.last(1)[:, 0].tolist()
+                if start < last_timestamp:
+                    continue  # Late trade for a closed candle
+                if start == last_timestamp:
+                    history.update_last((start, open_, max(high, price), min(low, price), price, volume + quantity))
+                    continue
+            history.append((start, price, price, price, price, quantity))
+
+    def add_ticker(self, ticker: Tickers):
+        """Fold a ticker in as a trade at its last price, volume taken from the 24h volume change."""
+        if self._last_ticker_volume is None:
+            quantity = 0
+        else:
+            quantity = max(ticker.volume - self._last_ticker_volume, 0)
+        self._last_ticker_volume = ticker.volume
+        self.add_trade(ticker.timestamp, ticker.close, quantity)
@@ -1,6 +1,9 @@
 import datetime as dt
 from typing import List
 
+import numpy as np
+
+from core.utils.ring_buffer import ColumnarRingBuffer
 import global_settings
 
 
@@ -13,23 +16,39 @@ class dotdict(dict):
     __setattr__ = dict.__setitem__
     __delattr__ = dict.__delitem__
 
+class BalanceHistory(ColumnarRingBuffer):
+    """Token balances stored column-wise, one row per inventory update."""
+
+    def __init__(self, tokens: List[str], capacity: int):
+        super().__init__(['timestamp'] + list(tokens), capacity)
+        self._tokens = list(tokens)
+
+    def _make(self, row):
+        return [row[0], dict(zip(self._tokens, row[1:]))]
+
+
 class Inventory():
     def __init__(self,
                  tokens: List[str]):
         self._tokens = tokens
         self.max_length = global_settings.DATA_MAX_LENGTH
         self._current_token_balance = {token: 0 for token in tokens}
-        self._all_token_balance: List = []
+        self._all_token_balance = BalanceHistory(tokens, self.max_length)
 
-    def update_inventory(self, inventory: dict):
+    def update_inventory(self, inventory: dict, partial: bool = False):
+        """
+        Record a balance update.
+
+        Args:
+        inventory (dict): tokens with available balance.
+        partial (bool): only the tokens in inventory changed, e.g. a streamed update, others keep their balance.
+        """
         for token in self._tokens:
+            if partial and token not in inventory:
+                continue
             self._current_token_balance[token] = inventory.get(token, 0)
-            if len(self._all_token_balance) < self.max_length:
-                self._all_token_balance.append(
-                    [dt.datetime.now(dt.timezone.utc).timestamp(), self._current_token_balance])
-            else:
-                self._all_token_balance = self._all_token_balance[1:] + [
-                    [dt.datetime.now(dt.timezone.utc).timestamp(), self._current_token_balance]]
+        self._all_token_balance.append([dt.datetime.now(dt.timezone.utc).timestamp()] +
+                                       [self._current_token_balance[token] for token in self._tokens])
 
     @property
     def get_all_balances(self):
@@ -39,8 +58,32 @@ class Inventory():
         Returns:
         balances List[List[timestamp, dict]]: List of all token balances with timestamp.
         """
+        return list(self._all_token_balance)
+
+    @property
+    def balance_history(self):
+        """
+        Get the columnar balance history.
+
+        Returns:
+        history (BalanceHistory): timestamp column plus one column per token.
+        """
         return self._all_token_balance
 
+    def get_balance_history(self, symbol: str, start: float = None, end: float = None):
+        """
+        Get balance history of a single token between two timestamps, both inclusive.
+
+        Returns:
+        timestamps (np.ndarray): read-only view of update timestamps, oldest first.
+        balances (np.ndarray): read-only view of token balances, aligned with timestamps.
+        """
+        timestamps = self._all_token_balance.column('timestamp')
+        balances = self._all_token_balance.column(symbol)
+        left = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+        right = len(timestamps) if end is None else np.searchsorted(timestamps, end, side='right')
+        return timestamps[left:right], balances[left:right]
+
     @property
     def get_current_balances(self):
         """
@@ -1,55 +1,188 @@
 import datetime
+from typing import List
 
-class OrderBook:
+import numpy as np
+from sortedcontainers import SortedList
+
+from core.entities.book_analytics import DepthAnalytics
+from core.utils.exception import OrderBookGapException
+
+
+class BookSide:
+    """One side of an L2 orderbook, kept sorted best price first.
+
+    Sizes live in a dict keyed by price and prices in a SortedList, so a size
+    change is O(1) and adding, removing or indexing a level is O(log n).
+    """
+
+    def __init__(self, levels, descending: bool):
+        self._descending = descending
+        self._sizes = {price: size for price, size in levels if size > 0}
+        self._keys = SortedList(self._key(price) for price in self._sizes)
+        self._levels = None
+        self._arrays = None
+
+    def _key(self, price):
+        return -price if self._descending else price
+
+    def __len__(self):
+        return len(self._keys)
+
+    def update(self, price: float, size: float):
+        """Set the size of a price level, a size of 0 removes the level."""
+        self._levels = None
+        self._arrays = None
+        if size > 0:
+            if price not in self._sizes:
+                self._keys.add(self._key(price))
+            self._sizes[price] = size
+        elif price in self._sizes:
+            del self._sizes[price]
+            self._keys.remove(self._key(price))
+
+    def price(self, n: int):
+        key = self._keys[n]
+        return -key if self._descending else key
+
+    def size(self, n: int):
+        return self._sizes[self.price(n)]
+
+    def top(self, n: int) -> List[List[float]]:
+        """Best n levels as [price, size]."""
+        return [[abs(key), self._sizes[abs(key)]] for key in self._keys.islice(0, n)]
+
+    def levels(self) -> List[List[float]]:
+        """Levels as [price, size], best first. Cached until the next update."""
+        if self._levels is None:
+            self._levels = [[abs(key), self._sizes[abs(key)]] for key in self._keys]
+        return self._levels
+
+    def arrays(self):
+        """Prices, sizes and cumulative sizes as float64 arrays, best first. Cached until the next update."""
+        if self._arrays is None:
+            prices = np.abs(np.fromiter(self._keys, dtype=np.float64, count=len(self._keys)))
+            sizes = np.fromiter(map(self._sizes.__getitem__, prices.tolist()), dtype=np.float64, count=len(prices))
+            self._arrays = (prices, sizes, np.cumsum(sizes))
+        return self._arrays
+
+
+class OrderBook(DepthAnalytics):
 
     def __init__(self, bids,
                  asks,
-                 timestamp: datetime.datetime.timestamp):
-        self._bids = sorted(bids)[::-1]
-        self._asks = sorted(asks)
+                 timestamp: datetime.datetime.timestamp,
+                 sequence: int = None):
+        self._bids = BookSide(bids, descending=True)
+        self._asks = BookSide(asks, descending=False)
         self._timestamp = timestamp
+        self._sequence = sequence
 
     @property
     def bids(self):
-        return self._bids
-    
+        return self._bids.levels()
+
     @property
     def asks(self):
-        return self._asks
+        return self._asks.levels()
+
+    @property
+    def bid_prices(self):
+        return self._bids.arrays()[0]
+
+    @property
+    def bid_sizes(self):
+        return self._bids.arrays()[1]
+
+    @property
+    def bid_cum_sizes(self):
+        return self._bids.arrays()[2]
+
+    @property
+    def ask_prices(self):
+        return self._asks.arrays()[0]
+
+    @property
+    def ask_sizes(self):
+        return self._asks.arrays()[1]
+
+    @property
+    def ask_cum_sizes(self):
+        return self._asks.arrays()[2]
 
     @property
     def timestamp(self):
         return self._timestamp
-    
+
+    @property
+    def sequence(self):
+        return self._sequence
+
+    def top_bids(self, n: int):
+        """Best n [price, size] bid levels."""
+        return self._bids.top(n)
+
+    def top_asks(self, n: int):
+        """Best n [price, size] ask levels."""
+        return self._asks.top(n)
+
+    def apply_update(self, bids, asks,
+                     timestamp: datetime.datetime.timestamp,
+                     sequence: int = None):
+        """Apply per-level deltas in place.
+        Args:
+            bids (List): [price, size] levels, size 0 removes the level.
+            asks (List): [price, size] levels, size 0 removes the level.
+            timestamp (float): update timestamp.
+            sequence (int): update sequence number, must follow the current one.
+        Returns:
+            applied (bool): False if the update is older than the book and was skipped.
+        """
+        if sequence is not None and self._sequence is not None:
+            if sequence <= self._sequence:
+                return False
+            if sequence != self._sequence + 1:
+                raise OrderBookGapException(f'Expected sequence {self._sequence + 1}, received {sequence}.')
+        for price, size in bids:
+            self._bids.update(price, size)
+        for price, size in asks:
+            self._asks.update(price, size)
+        self._timestamp = timestamp
+        self._sequence = sequence
+        return True
+
+    def copy(self):
+        """Return an independent snapshot of the book."""
+        return OrderBook(self.bids, self.asks, self._timestamp, self._sequence)
+
     @property
     def get_best_bid(self):
         if len(self._bids) > 0:
-            return self._bids[0][0]
+            return self._bids.price(0)
         else:
             return None
 
     @property
     def get_best_ask(self):
         if len(self._asks) > 0:
-            return self._asks[0][0]
+            return self._asks.price(0)
         else:
             return None
 
     def get_nth_best_bid(self,n):
         if len(self._bids) > 0:
             if len(self._bids) >= n+1:
-                return self._bids[n][0]
+                return self._bids.price(n)
             else:
-                return self._bids[(len(self._bids))-1][0]
+                return self._bids.price(len(self._bids) - 1)
         else:
             return None
-    
+
     def get_nth_best_ask(self,n):
         if len(self._asks) > 0:
             if len(self._asks) >= n+1:
-                return self._asks[n][0]
+                return self._asks.price(n)
             else:
-                return self._asks[(len(self._asks))-1][0]
+                return self._asks.price(len(self._asks) - 1)
         else:
             return None
 
@@ -59,4 +192,3 @@ class OrderBook:
             return (self.get_best_ask + self.get_best_bid) / 2
         else:
             return None
-        
\ No newline at end of file
@@ -1,8 +1,10 @@
-from typing import List, Tuple
+from typing import Tuple
 
 from core.entities.order_book import OrderBook
-from core.entities.price_state import PriceCandles, Tickers
+from core.entities.candle_builder import CandleBuilder
+from core.entities.price_state import PriceCandles, Tickers, CandleHistory, TickerHistory
 from core.entities.token import Token
+from core.utils.ring_buffer import RingBuffer
 import global_settings
 
 class Pair:
@@ -10,7 +12,8 @@ class Pair:
     def __init__(self,
                  base: Token,
                  quote: Token,
-                 symbol: str = None):
+                 symbol: str = None,
+                 depth: int = None):
         self._base_asset = base
         self._quote_asset = quote
         if not symbol:
@@ -18,13 +21,14 @@ class Pair:
         else:
             self._trading_pair = symbol
         self._max_length = global_settings.DATA_MAX_LENGTH
+        self._depth = global_settings.ORDERBOOK_DEPTH if depth is None else depth
 
         self._orderbook: OrderBook = None
-        self._trading_candle: PriceCandles = None
+        self._live_orderbook: OrderBook = None  # updated in place by a stream, never handed out
         self._ticker: Tickers = None
-        self._orderbooks: List[OrderBook] = []
-        self._trading_candles: List[PriceCandles] = []
-        self._tickers: List[Tickers] = []
+        self._orderbooks: RingBuffer = RingBuffer(self._max_length)
+        self._candle_builder = CandleBuilder(global_settings.CANDLE_PERIODS, self._max_length)
+        self._tickers: TickerHistory = TickerHistory(self._max_length)
         self._taker_rate = None
         self._maker_rate = None
         self._tick_size = None
@@ -42,6 +46,15 @@ class Pair:
     def trading_pair(self):
         return self._trading_pair
 
+    @property
+    def depth(self):
+        """Orderbook levels per side requested from the exchange, 0 for the full book."""
+        return self._depth
+
+    @depth.setter
+    def depth(self, val):
+        self._depth = val
+
     @property
     def taker_rate(self):
         return self._taker_rate
@@ -72,7 +85,7 @@ class Pair:
 
     @property
     def current_candles(self):
-        return self._trading_candle
+        return self._candle_builder.current('M1')
 
     @property
     def current_ticker(self):
@@ -84,7 +97,14 @@ class Pair:
 
     @property
     def trading_candles(self):
-        return self._trading_candles
+        return self._candle_builder.history('M1')
+
+    def candles(self, period: str) -> CandleHistory:
+        """Candle history of a period in CANDLE_PERIODS, the last candle is still open."""
+        return self._candle_builder.history(period)
+
+    def current_candle(self, period: str) -> PriceCandles:
+        return self._candle_builder.current(period)
 
     @property
     def tickers(self):
@@ -112,23 +132,33 @@ class Pair:
     def _add_orderbook(self, orderbook: OrderBook):
         if orderbook is not None:
             self._orderbook = orderbook
-            if len(self._orderbooks) < self._max_length:
-                self._orderbooks.append(orderbook)
-            else:
-                self._orderbooks = self._orderbooks[1:] + [orderbook]
+            self._orderbooks.append(orderbook)
+
+    def _set_live_orderbook(self, orderbook: OrderBook):
+        """Set an orderbook maintained in place by a stream, published by `_record_orderbook`."""
+        self._live_orderbook = orderbook
+
+    def _record_orderbook(self):
+        """Publish a snapshot of the live orderbook as the current one and record it into history.
+        Called on the exchange loop, so strategy threads only ever see books the stream no longer mutates.
+        """
+        if self._live_orderbook is not None:
+            self._orderbook = self._live_orderbook.copy()
+            self._orderbooks.append(self._orderbook)
 
     def _add_trading_candles(self, price_candles: PriceCandles):
         if price_candles is not None:
-            self._trading_candle = price_candles
-            if len(self._trading_candles) < self._max_length:
-                self._trading_candles.append(price_candles)
-            else:
-                self._trading_candles = self._trading_candles[1:] + [price_candles]
+            self._candle_builder.add_candle(price_candles)
+
+    def _add_trade(self, timestamp: float, price: float, quantity: float):
+        self._candle_builder.add_trade(timestamp, price, quantity)
+
+    def _add_ticker_candles(self, ticker: Tickers):
+        """Build candles from a ticker when no trade stream is available."""
+        if ticker is not None:
+            self._candle_builder.add_ticker(ticker)
 
     def _add_tickers(self, ticker: Tickers):
         if ticker is not None:
             self._ticker = ticker
-            if len(self._tickers) < self._max_length:
-                self._tickers.append(ticker)
-            else:
-                self._tickers = self._tickers[1:] + [ticker]
+            self._tickers.add(ticker)
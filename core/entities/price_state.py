@@ -1,5 +1,7 @@
 import datetime
 
+from core.utils.ring_buffer import ColumnarRingBuffer
+
 class PriceCandles:
 
     def __init__(self,
@@ -40,3 +42,33 @@ class Tickers:
         self.ask = ask
         self.bid = bid
         self.volume = volume
+
+
+class CandleHistory(ColumnarRingBuffer):
+    """Candles of a single period stored column-wise."""
+    COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, capacity: int, period: str = 'M1'):
+        super().__init__(self.COLUMNS, capacity)
+        self.period = period
+
+    def add(self, candle: PriceCandles):
+        self.append((candle.timestamp, candle.open, candle.high, candle.low, candle.close, candle.volume))
+
+    def _make(self, row):
+        return PriceCandles(*row, self.period)
+
+
+class TickerHistory(ColumnarRingBuffer):
+    """Tickers stored column-wise."""
+    COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'ask', 'bid', 'volume')
+
+    def __init__(self, capacity: int):
+        super().__init__(self.COLUMNS, capacity)
+
+    def add(self, ticker: Tickers):
+        self.append((ticker.timestamp, ticker.open, ticker.high, ticker.low, ticker.close,
+                     ticker.ask, ticker.bid, ticker.volume))
+
+    def _make(self, row):
+        return Tickers(*row)
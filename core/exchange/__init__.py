@@ -1,5 +1,9 @@
-from core.exchange.exchange_base import SpotExchange, ProcessingStatus, MarketStatus, BasicStatus
+from core.exchange.exchange_base import SpotExchange, ProcessingStatus, MarketStatus, BasicStatus, ActionPhase
+from core.exchange.loop_timer import LoopTimer, PhaseStats
 from core.exchange.order_manger import OrderManager, ActiveStatus
+from core.exchange.quote_engine import QuoteReconciler, QuoteDiff
+from core.exchange.scheduler import DataType, RefreshScheduler
+from core.exchange.snapshot import MarketSnapshot
 from core.exchange.connector import BaseConnector, FMFWConnector
 
 __all__ = [
@@ -7,8 +11,16 @@ __all__ = [
     'ProcessingStatus',
     'MarketStatus',
     'BasicStatus',
+    'ActionPhase',
     'OrderManager',
     'ActiveStatus',
+    'LoopTimer',
+    'PhaseStats',
+    'QuoteReconciler',
+    'QuoteDiff',
+    'DataType',
+    'RefreshScheduler',
+    'MarketSnapshot',
     'BaseConnector',
     'FMFWConnector'
 ]
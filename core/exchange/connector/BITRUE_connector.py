@@ -1,21 +1,21 @@
-import aiohttp
 import datetime as dt
 import hmac
 import hashlib
+import time
 from typing import List
 from urllib.parse import urlencode
-import json
 
 import global_settings
-from core.entities import SpotOrder, OrderBook, PriceCandles, Tickers, OrderStatus, OrderType, TradeSide
+from core.entities import SpotOrder, ArrayOrderBook, PriceCandles, Tickers, OrderStatus, OrderType, TradeSide
 from core.exchange.connector.base_connector import BaseConnector
-from core.utils import setup_custom_logger, time_out
+from core.exchange.connector.retry_policy import RetryPolicy, RetryAction
+from core.utils import setup_custom_logger
 
-def _create_signature(secret_key: str, query: str):
-    signature = hmac.new(bytes(secret_key,'utf-8'),
-                msg = bytes(query,'utf-8'),
-                digestmod = hashlib.sha256).hexdigest()
-    return signature
+def _create_signature(keyed_hmac, query: str):
+    """Sign a query string with a copy of an HMAC already keyed with the secret."""
+    signature = keyed_hmac.copy()
+    signature.update(query.encode())
+    return signature.hexdigest()
 
 class BITRUEConnector(BaseConnector):
 
@@ -26,6 +26,41 @@ class BITRUEConnector(BaseConnector):
         self._order_ids = {}
         self._active_orders = []
         self._ws_available = False
+        self._weight_limit = 20  # 1200 request weight per minute
+        self._endpoint_weights = {'/api/v1/account': 5}  # endpoints not listed weigh 1
+        self._receive_window = 10000
+        self._auth_headers = {}
+        self._keyed_hmac = None
+        self._retry_policy = RetryPolicy({418: RetryAction.RETRY, 429: RetryAction.RETRY, 500: RetryAction.RETRY,
+                                          502: RetryAction.RETRY, 503: RetryAction.RETRY, 504: RetryAction.RETRY})
+
+    def _prepare_auth(self):
+        self._auth_headers = {'X-MBX-APIKEY': self._api_key}
+        self._keyed_hmac = hmac.new(self._secret_key.encode(), digestmod=hashlib.sha256)
+
+    def _depth_weight(self):
+        """Weight of an orderbook request, it grows with the number of levels requested."""
+        depth = max([p.depth or 100 for p in self.pairs] or [100])  # 100 levels when no limit is sent
+        if depth <= 100:
+            return 1
+        elif depth <= 500:
+            return 5
+        return 10
+
+    def _request_weight(self, path: str, verb: str):
+        if path == '/api/v1/depth':
+            return self._depth_weight()
+        return self._endpoint_weights.get(path, 1)
+
+    def polling_cost(self, data_type: str, n_orders: int = 0):
+        # Market data and open orders are requested one symbol at a time.
+        if data_type == 'orderbook':
+            return len(self.trading_pairs) * self._depth_weight()
+        elif data_type in ('ticker', 'orders'):
+            return len(self.trading_pairs)
+        elif data_type == 'inventory':
+            return self._request_weight('/api/v1/account', 'GET')
+        return 1
 
     async def _get_inventory_balance(self):
         response = await self._curl('/api/v1/account', auth=True)
@@ -45,45 +80,51 @@ class BITRUEConnector(BaseConnector):
         orderbooks = {}
         symbols = self.trading_pairs
         ts = dt.datetime.now(dt.timezone.utc).timestamp()
-        for s in symbols:
-            res = await self._curl('/api/v1/depth',query={'symbol':s})
-            if res is not None:
-                bid = [[float(x[0]), float(x[1])] for x in res['bids']]
-                ask = [[float(x[0]), float(x[1])] for x in res['asks']]
-                orderbooks[s] = OrderBook(bid, ask, ts)
+        queries = [{'symbol':p.trading_pair, 'limit':p.depth} if p.depth else {'symbol':p.trading_pair} for p in self.pairs]
+        results = await self._fan_out([self._curl('/api/v1/depth', query=q) for q in queries], symbols)
+        for s, res in results:
+            orderbooks[s] = ArrayOrderBook.from_levels(res['bids'], res['asks'], ts)
         return orderbooks
     
     async def _get_tickers(self):
         tickers = {}
         ts = dt.datetime.now(dt.timezone.utc).timestamp()
         symbols = self.trading_pairs
-        for s in symbols:
-            res = await self._curl('/api/v1/ticker/24hr', query={'symbol':s})
-            if res is not None:
-                res = res[0]
-                tickers[s] = Tickers(ts, float(res['openPrice']), float(res['highPrice']),
-                                    float(res['lowPrice']), float(res['lastPrice']), float(res['askPrice']),
-                                    float(res['bidPrice']), float(res['volume']))
+        results = await self._fan_out([self._curl('/api/v1/ticker/24hr', query={'symbol':s}) for s in symbols], symbols)
+        for s, res in results:
+            res = res[0]
+            tickers[s] = Tickers(ts, float(res['openPrice']), float(res['highPrice']),
+                                float(res['lowPrice']), float(res['lastPrice']), float(res['askPrice']),
+                                float(res['bidPrice']), float(res['volume']))
         return tickers
 
     async def _get_trading_candles(self, period: str = 'M1'):
         price_candles = {}
         ts = dt.datetime.now(dt.timezone.utc).timestamp()
         symbols = self.trading_pairs
-        for s in symbols:
-            res = await self._curl('//', query={'symbol':s, 'period':period}, attribute='kline')
-            if res is not None:
-                d = res['data'][-1]
-                price_candles[s] = PriceCandles(ts, float(d['open']), float(d['high']),
-                                            float(d['low']), float(d['close']), float(d['vol']), period)
+        results = await self._fan_out([self._curl('//', query={'symbol':s, 'period':period}, attribute='kline')
+                                       for s in symbols], symbols)
+        for s, res in results:
+            d = res['data'][-1]
+            price_candles[s] = PriceCandles(ts, float(d['open']), float(d['high']),
+                                        float(d['low']), float(d['close']), float(d['vol']), period)
         return price_candles
     
+    async def _get_candle_history(self, period: str, limit: int):
+        price_candles = {}
+        symbols = self.trading_pairs
+        results = await self._fan_out([self._curl('//', query={'symbol':s, 'period':period}, attribute='kline')
+                                       for s in symbols], symbols)
+        for s, res in results:
+            price_candles[s] = [PriceCandles(float(d['id']), float(d['open']), float(d['high']),
+                                             float(d['low']), float(d['close']), float(d['vol']), period)
+                                for d in res['data'][-limit:]]
+        return price_candles
+
     async def _create_spot_orders(self, spot_orders: List[SpotOrder]):
-        data = []
-        for spot_order in spot_orders:
-            res = await self._create_spot_order(spot_order)
-            data.append(res)
-        return data
+        results = await self._fan_out([self._create_spot_order(spot_order) for spot_order in spot_orders],
+                                      [spot_order.order_id for spot_order in spot_orders], limit=len(spot_orders))
+        return [spot_order for _, spot_order in results]
 
     async def _create_spot_order(self, spot_order:SpotOrder):
         quantity = spot_order.quantity
@@ -119,38 +160,35 @@ class BITRUEConnector(BaseConnector):
 
     async def _cancel_spot_order(self, spot_order:SpotOrder):
         client_order_id = spot_order.order_id
-        order_id = self._order_ids[client_order_id]
-        ts = int(dt.datetime.now().timestamp()*1000)
-        spot_order.updated_at = ts
-        spot_order.status = OrderStatus.CANCELED
-        response = await self._curl('/api/v1/order',auth = True,verb='DELETE', query={'symbol':spot_order.pair.trading_pair,
-                                    'origClientOrderId':client_order_id,'orderId':order_id})
+        query = {'symbol':spot_order.pair.trading_pair, 'origClientOrderId':client_order_id}
+        # The client order id alone is enough when the exchange id was never seen, e.g. after a timed out create
+        if client_order_id in self._order_ids:
+            query['orderId'] = self._order_ids[client_order_id]
+        response = await self._curl('/api/v1/order',auth = True,verb='DELETE', query=query)
         if response is not None:
+            spot_order.updated_at = int(dt.datetime.now().timestamp()*1000)
+            spot_order.status = OrderStatus.CANCELED
+            self._order_ids.pop(client_order_id, None)
             return spot_order
         else:
             return None
     
     async def _cancel_spot_orders(self, spot_orders:List[SpotOrder]):
-        data = []
-        for spot_order in spot_orders:
-            res = await self._cancel_spot_order(spot_order)
-            data.append(res)
-        return data
+        results = await self._fan_out([self._cancel_spot_order(spot_order) for spot_order in spot_orders],
+                                      [spot_order.order_id for spot_order in spot_orders], limit=len(spot_orders))
+        return [spot_order for _, spot_order in results]
 
     async def _get_active_spot_orders(self):
         data = []
-        for symbol in self._trading_pairs:
-            result = await self._curl('/api/v1/openOrders', auth=True, query={'symbol':symbol})
-            if result is not None:
-                if len(result) > 0:
-                    for r in result:
-                        data.append(r)
-                else:
-                    self._order_ids = {}
-                    self._active_orders = []
-                    return []
+        symbols = self._trading_pairs
+        results = await self._fan_out([self._curl('/api/v1/openOrders', auth=True, query={'symbol':s})
+                                       for s in symbols], symbols)
+        if symbols and not results:
+            return None
+        for _, result in results:
+            data.extend(result)
         main_data = []
-        self._order_ids = {}
+        # Merged, not rebuilt: a failed symbol or an order created meanwhile must keep its id
         for order in data:
             if order['type'] == 'LIMIT':
                 typ = OrderType.LIMIT
@@ -175,13 +213,15 @@ class BITRUEConnector(BaseConnector):
                                 created_at=float(order['time']), updated_at=float(order['updateTime']))
             main_data.append(spot_order)
             self._order_ids[order['clientOrderId']]= order_id
-            self._active_orders = main_data
+        self._active_orders = main_data
         return main_data
 
     async def _query_order(self, spot_order:SpotOrder):
         client_order_id = spot_order.order_id
-        order_id = self._order_ids[client_order_id]
-        res = await self._curl('/api/v1/order', auth=True, query={'symbol':spot_order.pair.trading_pair, 'orderId':order_id})
+        query = {'symbol':spot_order.pair.trading_pair, 'origClientOrderId':client_order_id}
+        if client_order_id in self._order_ids:
+            query['orderId'] = self._order_ids[client_order_id]
+        res = await self._curl('/api/v1/order', auth=True, query=query)
         if res['status'] == 'NEW':
             spot_order.status = OrderStatus.NEW
         elif res['status'] == 'FILLED':
@@ -192,79 +232,33 @@ class BITRUEConnector(BaseConnector):
             spot_order.status = OrderStatus.CANCELED
         spot_order.quantity_cumulative = float(res['cummulativeQuoteQty'])
         spot_order.updated_at = res['updateTime']
+        if spot_order.status in (OrderStatus.FILLED, OrderStatus.CANCELED):
+            self._order_ids.pop(client_order_id, None)
         return spot_order
     
-    async def _query_orders(self, spot_orders:List[SpotOrder]):
-        if not spot_orders:
-            return []
-        else:
-            data = []
-            for spot_order in spot_orders:
-                res = await self._query_order(spot_order)
-                data.append(res)
-            return data
-
-    @time_out
-    async def _curl(self, path: str, auth:bool=False, verb: str = None, query: dict = None, post_dict: dict = None, attribute: str = None, retry_count: int = 0):
+    async def _curl(self, path: str, auth:bool=False, verb: str = None, query: dict = None, post_dict: dict = None, attribute: str = None, response_type=None):
         """Send a request to Server."""
+        if not verb:
+            verb = 'GET'
         if not attribute:
-            if not verb:
-                verb = 'GET'
-            headers = {'X-MBX-APIKEY': self._api_key}
-            max_retries = self._retries
-            timestamp = int(dt.datetime.now().timestamp()*1000)
+            headers = self._auth_headers
             url = self._api_endpoint + path
-            rcv_window = 10000
-            if not query:
-                query = {}
-            query['recvWindow'] = rcv_window
-            query['timestamp'] = timestamp
-            query_string = urlencode(query)
-            signature = _create_signature(self._secret_key,query_string)
-            url += '?' + query_string + '&signature=' + signature
+            # Serialized once, only the timestamp and signature change between attempts
+            query_string = urlencode({**(query or {}), 'recvWindow': self._receive_window})
         else:
             verb = 'GET'
             headers = {}
             url = 'https://www.bitrue.com/kline-api/kline/history/' + query['symbol'] + '/market_meldusdt_kline_' + query['period']
-            
-        async def retry():
-            r = await self._curl(path, auth, verb, query, post_dict, attribute, retry_count + 1)
-            return r
-        try:
-            if verb == 'GET':
-                async with self._session.get(url, headers=headers) as resp:
-                    resp.raise_for_status()
-                    response = await resp.text()
-            elif verb == 'POST':
-                async with self._session.post(url, headers=headers) as resp:
-                    resp.raise_for_status()
-                    response = await resp.text()
-            elif verb == 'PATCH':
-                async with self._session.patch(url, headers=headers) as resp:
-                    resp.raise_for_status()
-                    response = await resp.text()
-            elif verb == 'PUT':
-                async with self._session.put(url, headers=headers) as resp:
-                    resp.raise_for_status()
-                    response = await resp.text()
-            elif verb == 'DELETE':
-                async with self._session.delete(url, headers=headers) as resp:
-                    resp.raise_for_status()
-                    response = await resp.text()
-        
-        except aiohttp.ClientResponseError as e:
-            self.logger.info(e)
-            resp_status = resp.status
-            # if resp_status == 500 or resp_status == 503:
-            if resp_status > 200:
-                if retry_count < max_retries:
-                    self.logger.warning("Service unavailable. Retrying.")
-                    return await retry()
-                else:
-                    return None
-            else:
-                raise e
-        except Exception as e:
-            self.logger.info(e)
-            raise e
-        return json.loads(response)
+
+        def prepare():
+            if attribute:
+                return url, headers, None
+            # Signed again on every attempt so the timestamp stays within the receive window
+            signed = query_string + '&timestamp=' + str(int(time.time() * 1000))
+            signature = _create_signature(self._keyed_hmac, signed)
+            return url + '?' + signed + '&signature=' + signature, headers, None
+
+        response = await self._request(path, verb, auth, prepare)
+        if response is None:
+            return None
+        return self._decoder.decode(response, response_type)
@@ -1,14 +1,16 @@
-import aiohttp
-import json
+import asyncio
 from base64 import b64encode
 import datetime as dt
-from typing import List
+from typing import Dict, List, Tuple, TypedDict
 from urllib.parse import urlencode
 
 import global_settings
-from core.entities import SpotOrder, OrderBook, PriceCandles, Tickers, TradeSide, OrderType, OrderStatus
+from core.entities import SpotOrder, OrderBook, ArrayOrderBook, PriceCandles, Tickers, TradeSide, OrderType, OrderStatus
 from core.exchange.connector.base_connector import BaseConnector
-from core.utils import setup_custom_logger, time_out
+from core.exchange.connector.retry_policy import RetryPolicy, RetryAction
+from core.exchange.connector.ws_stream import WSStream
+from core.utils import setup_custom_logger
+from core.utils.exception import OrderBookGapException
 
 
 def _build_headers(api_key: str, secret_key: str):
@@ -17,11 +19,20 @@ def _build_headers(api_key: str, secret_key: str):
     headers = {'Authorization': 'Basic ' + msg}
     return headers
 
+class OrderBookLevels(TypedDict):
+    timestamp: str
+    ask: List[Tuple[float, float]]
+    bid: List[Tuple[float, float]]
+
+
+OrderBooksResponse = Dict[str, OrderBookLevels]
+
+
 def convert_timestamp(ts):
     """
-    Convert ISO timestamp from FMFW to unix timestamp.
+    Convert ISO timestamp from FMFW to unix timestamp. FMFW times are UTC, whatever the host time zone.
     """
-    unix_timestamp = dt.datetime.fromisoformat(ts[:19]).timestamp()
+    unix_timestamp = dt.datetime.fromisoformat(ts[:19]).replace(tzinfo=dt.timezone.utc).timestamp()
     return unix_timestamp
 
 class FMFWConnector(BaseConnector):
@@ -35,7 +46,59 @@ class FMFWConnector(BaseConnector):
         self._market_rate_limit = 30
         self._trading_rate_limit = 300
         self._other_rate_limit = 20
-        self._ws_available = False
+        self._rate_limit = self._market_rate_limit
+        self._ws_available = True
+        self._replace_available = True
+        self._orderbook_channel = 'orderbook/full'
+        self._live_orderbooks = {}
+        self._trading_stream: WSStream = None
+        self._trading_logged_in = False
+        self._auth_headers = {}
+        # HTTP Status Codes, 400 and 404 are not retried as the same request fails again
+        self._retry_policy = RetryPolicy({401: RetryAction.RAISE,  # Unauthorized
+                                          403: RetryAction.RAISE,  # Forbidden
+                                          429: RetryAction.RETRY,  # Too Many Requests
+                                          500: RetryAction.RAISE,  # Internal Server Error
+                                          503: RetryAction.RETRY,  # Service Unavailable
+                                          504: RetryAction.RETRY}, # Gateway Timeout
+                                         default=RetryAction.FAIL)
+        self._status_messages = {400: 'Bad Request.',
+                                 401: 'API Key or Secret incorrect, please check and restart.',
+                                 403: 'Forbidden. Please restart.',
+                                 404: 'Unable to contact the API (404).',
+                                 429: 'Ratelimited on current request. Sleeping, then trying again.',
+                                 500: 'Internal Server Error',
+                                 503: 'Unable to contact the API (503), retrying.',
+                                 504: 'Request timeout expired'}
+
+    def _prepare_auth(self):
+        self._auth_headers = _build_headers(self._api_key, self._secret_key)
+
+    def _rate_limits(self):
+        return {'market': self._market_rate_limit,
+                'trading': self._trading_rate_limit,
+                'other': self._other_rate_limit}
+
+    def _endpoint_class(self, path: str, verb: str):
+        if path.startswith('/api/3/public/'):
+            return 'market'
+        elif path.startswith('/api/3/spot/order'):
+            return 'trading'
+        else:
+            return 'other'
+
+    def polling_cost(self, data_type: str, n_orders: int = 0):
+        return 1
+
+    def _parse_status(self, status: str):
+        if status == 'new':
+            return OrderStatus.NEW
+        elif status == 'partiallyFilled':
+            return OrderStatus.PARTIALLY_FILLED
+        elif status == 'filled':
+            return OrderStatus.FILLED
+        else:
+            return OrderStatus.CANCELED
 
     def _modify_order_model(self,response):
         side = response['side']
@@ -43,15 +106,7 @@ class FMFWConnector(BaseConnector):
             side = TradeSide.BUY
         else:
             side = TradeSide.SELL
-        status = response['status']
-        if status == 'new':
-            status = OrderStatus.NEW
-        elif status == 'partiallyFilled':
-            status = OrderStatus.PARTIALLY_FILLED
-        elif status == 'filled':
-            status = OrderStatus.FILLED
-        else:
-            status = OrderStatus.CANCELED
+        status = self._parse_status(response['status'])
         typ = response['type']
         if typ == 'limit':
             typ = OrderType.LIMIT
@@ -73,7 +128,7 @@ class FMFWConnector(BaseConnector):
         """
         response = await self._curl('/api/3/spot/balance', auth=True)
         data = {}
-        if len(response) > 0:
+        if response:
             for i in response:
                 # reserved = float(i['reserved'])
                 data[i['currency']] = float(i['available'])
@@ -81,26 +136,42 @@ class FMFWConnector(BaseConnector):
         else:
             return None
 
-    async def _get_order_book(self, symbols: List[str]):
-        """Fetch orderbook by symbol. Public method.
-        Args:
-            symbols (List): list of token symbols.
+    async def _get_order_book(self):
+        """Fetch orderbooks of all trading pairs, each at its pair depth. Public method.
         Returns:
             orderbook_dict (dict): dict of token symbol with orderbook.
         """
-        response = await self._curl('/api/3/public/orderbook', query={'depth': 0, 'symbols': ','.join(symbols)})
-        if len(response) != len(symbols):
-            self.logger.error('Total number of symbols larger than input')
-            return None
-        else:
-            orderbooks = {}
+        # Depth applies to the whole request, one request per distinct depth
+        symbols_by_depth = {}
+        for pair in self.pairs:
+            symbols_by_depth.setdefault(pair.depth, []).append(pair.trading_pair)
+        depths = list(symbols_by_depth)
+        results = await self._fan_out([self._curl('/api/3/public/orderbook',
+                                                  query={'depth': d, 'symbols': ','.join(symbols_by_depth[d])},
+                                                  response_type=OrderBooksResponse) for d in depths], depths)
+        orderbooks = {}
+        for depth, response in results:
+            symbols = symbols_by_depth[depth]
+            if len(response) != len(symbols):
+                self.logger.error('Total number of symbols larger than input')
+                return None
             for s in symbols:
                 timestamp = response[s]['timestamp']
                 unix_timestamp = convert_timestamp(timestamp)
-                bid = [[float(x[0]), float(x[1])] for x in response[s]['bid']]
-                ask = [[float(x[0]), float(x[1])] for x in response[s]['ask']]
-                orderbooks[s] = OrderBook(bid, ask, unix_timestamp)
-            return orderbooks
+                orderbooks[s] = ArrayOrderBook.from_levels(response[s]['bid'], response[s]['ask'], unix_timestamp)
+        return orderbooks
+
+    async def _create_spot_orders(self, spot_orders: List[SpotOrder]):
+        """Place the orders of one requote concurrently, each under the trading rate limit.
+        FMFW order lists only take all-or-none fill-or-kill orders, so passive quotes are sent one per request.
+        Args:
+            spot_orders (List[SpotOrder]): orders to place.
+        Returns:
+            spot_orders (List[SpotOrder]): placed orders updated from the exchange report, failed ones are left out.
+        """
+        results = await self._fan_out([self._create_spot_order(spot_order) for spot_order in spot_orders],
+                                      [spot_order.order_id for spot_order in spot_orders], limit=len(spot_orders))
+        return [spot_order for _, spot_order in results]
 
     async def _create_spot_order(self, spot_order: SpotOrder):
         """Create a spot order.
@@ -147,14 +218,20 @@ class FMFWConnector(BaseConnector):
             typ = None
         if order_type == OrderType.LIMIT:
             post_dict = {'client_order_id': order_id, 'symbol': pair.trading_pair,
-                        'side': side, 'quantity': quantity, 'price': quote_price, 'type': typ}
+                        'side': side, 'quantity': str(quantity), 'price': str(quote_price), 'type': typ}
         else:
             post_dict = {'client_order_id': order_id, 'symbol': pair.trading_pair,
-                        'side': side, 'quantity': quantity, 'type': typ}
-        response = await self._curl('/api/3/spot/order', auth=True,verb='POST', post_dict=post_dict)
-        if response is not None:
-            spot_order.status = OrderStatus.FILLED
-            spot_order.quantity_cumulative = spot_order.quantity
+                        'side': side, 'quantity': str(quantity), 'type': typ}
+        if self.trading_stream_ready:
+            response = await self._trading_request('spot_new_order', post_dict)
+        else:
+            response = await self._curl('/api/3/spot/order', auth=True,verb='POST', post_dict=post_dict)
+        if response is None:
+            return None
+        spot_order.status = self._parse_status(response['status'])
+        spot_order.quantity_cumulative = float(response['quantity_cumulative'])
+        spot_order.created_at = convert_timestamp(response['created_at'])
+        spot_order.updated_at = convert_timestamp(response['updated_at'])
         return spot_order
 
     async def _cancel_spot_order(self, spot_order:SpotOrder):
@@ -165,7 +242,10 @@ class FMFWConnector(BaseConnector):
             Spot order
         """
         client_order_id = spot_order.order_id
-        response = await self._curl('/api/3/spot/order/', auth=True,verb='DELETE', attribute=client_order_id)
+        if self.trading_stream_ready:
+            response = await self._trading_request('spot_cancel_order', {'client_order_id': client_order_id})
+        else:
+            response = await self._curl('/api/3/spot/order/', auth=True,verb='DELETE', attribute=client_order_id)
         if response is not None:
             spot_order.status = OrderStatus.CANCELED
             spot_order.quantity_cumulative = float(response['quantity_cumulative'])
@@ -176,20 +256,46 @@ class FMFWConnector(BaseConnector):
             return None
 
     async def _cancel_spot_orders(self, spot_orders: List[SpotOrder]):
-        data = []
-        for spot_order in spot_orders:
-            res = await self._cancel_spot_order(spot_order)
-            if res is not None:
-                data.append(res)
-        return data
-
-    async def _cancel_all_spot_orders(self, symbols:List[str]):
-        """Cancel all spot orders.
+        results = await self._fan_out([self._cancel_spot_order(spot_order) for spot_order in spot_orders],
+                                      [spot_order.order_id for spot_order in spot_orders], limit=len(spot_orders))
+        return [spot_order for _, spot_order in results]
+
+    async def _replace_spot_order(self, spot_order: SpotOrder, new_order: SpotOrder):
+        """Replace a live order by a new order at another price and quantity in one request.
+        Args:
+            spot_order (SpotOrder): live order, cancelled by the replacement.
+            new_order (SpotOrder): replacing order with its own client order id.
+        Returns:
+            Replacing spot order, None if the request failed.
+        """
+        pair = new_order.pair
+        params = {'client_order_id': spot_order.order_id, 'new_client_order_id': new_order.order_id,
+                  'quantity': str(self._round_nearest(new_order.quantity, pair.quantity_increment)),
+                  'price': str(self._round_nearest(new_order.price, pair.tick_size))}
+        if self.trading_stream_ready:
+            response = await self._trading_request('spot_replace_order', params)
+        else:
+            post_dict = {k: v for k, v in params.items() if k != 'client_order_id'}
+            response = await self._curl('/api/3/spot/order/', auth=True, verb='PATCH',
+                                        attribute=spot_order.order_id, post_dict=post_dict)
+        if response is None:
+            return None
+        spot_order.status = OrderStatus.CANCELED
+        new_order.status = self._parse_status(response['status'])
+        new_order.quantity_cumulative = float(response['quantity_cumulative'])
+        new_order.created_at = convert_timestamp(response['created_at'])
+        new_order.updated_at = convert_timestamp(response['updated_at'])
+        return new_order
+
+    async def _cancel_all_spot_orders(self, symbol: str):
+        """Cancel all spot orders of a symbol.
         Returns: 
-            Array of spot orders.
+            Array of spot orders, None if the request failed.
         """
-        response = await self._curl('/api/3/spot/order', auth=True,verb='DELETE')
-        if len(response) < 1:
+        response = await self._curl('/api/3/spot/order', auth=True, verb='DELETE', query={'symbol': symbol})
+        if response is None:
+            return None
+        elif len(response) < 1:
             return []
         else:
             res = []
@@ -198,10 +304,25 @@ class FMFWConnector(BaseConnector):
                 res.append(spot_order)
         return res
 
+    async def _query_order(self, spot_order: SpotOrder):
+        """Get the final state of an order that is no longer open.
+        Returns:
+            Spot order, None if not found.
+        """
+        response = await self._curl('/api/3/spot/history/order', auth=True,
+                                    query={'client_order_id': spot_order.order_id})
+        if not response:
+            return None
+        report = response[0]
+        spot_order.status = self._parse_status(report['status'])
+        spot_order.quantity_cumulative = float(report['quantity_cumulative'])
+        spot_order.updated_at = convert_timestamp(report['updated_at'])
+        return spot_order
+
     async def _get_active_spot_orders(self):
-        """Get all active spot orders.
+        """Get all active spot orders of the trading pairs.
         Returns: 
-            Array of active spot orders.
+            Array of active spot orders, None if the request failed.
         """
         response = await self._curl('/api/3/spot/order', auth=True)
         if response is not None:
@@ -210,24 +331,25 @@ class FMFWConnector(BaseConnector):
             else:
                 res = []
                 for r in response:
-                    spot_order = self._modify_order_model(r)
-                    res.append(spot_order)
+                    if r['symbol'] in self._trading_pairs:
+                        spot_order = self._modify_order_model(r)
+                        res.append(spot_order)
                 return res
         else:
-            return []
+            return None
 
-    async def _get_trading_candles(self, symbols: List[str], period: str = 'M1'):
-        """Get candles for a list of symbols.
+    async def _get_trading_candles(self, period: str = 'M1'):
+        """Get the latest candle of all trading pairs.
         Args:
-            symbols (List): List of symbols.
             period (str): Period of candles. M1, 1D.
         Returns:
             dict_price_candles (Dict): Dict of PriceCandles.
             PriceCandle.
         """
+        symbols = self.trading_pairs
         query = {'symbols': ','.join(symbols), 'period': period, 'limit': 1}
         response = await self._curl('/api/3/public/candles', query=query)
-        if len(response) != len(symbols):
+        if response is None or len(response) != len(symbols):
             return None
         else:
             price_candles = {}
@@ -241,10 +363,29 @@ class FMFWConnector(BaseConnector):
                 price_candles[s] = price_candle
         return price_candles
 
-    async def _get_tickers(self, symbols: List[str]):
-        """Get tickers information for a list of symbols.
+    async def _get_candle_history(self, period: str, limit: int):
+        """Get candle history for all trading pairs.
         Args:
-        symbols (List): List of symbols.
+            period (str): Period of candles. M1, M5, M15, H1.
+            limit (int): Number of candles per symbol, max 1000.
+        Returns:
+            dict_price_candles (Dict): Dict of symbol with List of PriceCandles, oldest first.
+        """
+        symbols = self.trading_pairs
+        query = {'symbols': ','.join(symbols), 'period': period, 'sort': 'ASC', 'limit': limit}
+        response = await self._curl('/api/3/public/candles', query=query)
+        if response is None or len(response) != len(symbols):
+            return None
+        else:
+            price_candles = {}
+            for s in symbols:
+                price_candles[s] = [PriceCandles(convert_timestamp(d['timestamp']), float(d['open']),
+                                                 float(d['max']), float(d['min']), float(d['close']),
+                                                 float(d['volume']), period) for d in response[s]]
+            return price_candles
+
+    async def _get_tickers(self):
+        """Get tickers information of all trading pairs.
         Returns:
             dict_tickers (dict): Dict of Tickers.
             ask (float): Best ask price. Can return null if no data.
@@ -256,9 +397,10 @@ class FMFWConnector(BaseConnector):
             volume (float): Total trading amount within 24 hours in base currency.
             timestamp (float): Last update or refresh ticker timestamp.
         """
+        symbols = self.trading_pairs
         query = {'symbols': ','.join(symbols)}
         response = await self._curl('/api/3/public/ticker', query=query)
-        if len(response) != len(symbols):
+        if response is None or len(response) != len(symbols):
             return None
         else:
             tickers = {}
@@ -271,6 +413,164 @@ class FMFWConnector(BaseConnector):
                 tickers[s] = ticker
             return tickers
 
+    async def _run_market_stream(self):
+        """Subscribe to orderbook, ticker and trade channels of all trading pairs."""
+        self._ws_stream = WSStream(self._session, self._ws_endpoint, self._handle_market_message,
+                                   on_disconnect=self._on_stream_disconnect)
+        symbols = list(self.trading_pairs)
+        await self._ws_stream.subscribe({'method': 'subscribe', 'ch': self._orderbook_channel,
+                                         'params': {'symbols': symbols}})
+        await self._ws_stream.subscribe({'method': 'subscribe', 'ch': 'ticker/1s',
+                                         'params': {'symbols': symbols}})
+        await self._ws_stream.subscribe({'method': 'subscribe', 'ch': 'trades',
+                                         'params': {'symbols': symbols, 'limit': 1}})
+        await self._ws_stream.run()
+
+    def _handle_market_message(self, message: dict):
+        """Dispatch a public stream notification into the pairs.
+        Args:
+            message (dict): decoded websocket message.
+        """
+        channel = message.get('ch')
+        if channel is None:
+            if 'error' in message:
+                self.logger.error(f'Market stream error: {message["error"]}')
+            return
+        if channel == self._orderbook_channel:
+            if 'snapshot' in message:
+                for s, d in message['snapshot'].items():
+                    bid = [[float(x[0]), float(x[1])] for x in d['b']]
+                    ask = [[float(x[0]), float(x[1])] for x in d['a']]
+                    orderbook = OrderBook(bid, ask, d['t'] / 1000, d['s'])
+                    self._live_orderbooks[s] = orderbook
+                    self.get_pair(s)._set_live_orderbook(orderbook)
+                    self._mark_stream_update('orderbook', s)
+            for s, d in message.get('update', {}).items():
+                orderbook = self._live_orderbooks.get(s)
+                if orderbook is None:
+                    continue  # Waiting for a snapshot after resync
+                bid = [[float(x[0]), float(x[1])] for x in d['b']]
+                ask = [[float(x[0]), float(x[1])] for x in d['a']]
+                try:
+                    orderbook.apply_update(bid, ask, d['t'] / 1000, d['s'])
+                    self._mark_stream_update('orderbook', s)
+                except OrderBookGapException as e:
+                    self.logger.warning(f'Orderbook of {s} out of sync: {e} Resyncing.')
+                    self._resync_orderbook(s)
+        elif channel.startswith('ticker/'):
+            for s, d in message.get('data', {}).items():
+                ticker = Tickers(d['t'] / 1000, float(d['o']), float(d['h']), float(d['l']), float(d['c']),
+                                 float(d['a']), float(d['b']), float(d['v']))
+                pair = self.get_pair(s)
+                pair._add_tickers(ticker)
+                if ('trades', s) not in self._stream_ready:
+                    pair._add_ticker_candles(ticker)
+                self._mark_stream_update('ticker', s)
+        elif channel == 'trades':
+            # The snapshot only confirms the subscription, its trades are covered by the backfill.
+            for s in message.get('snapshot', {}):
+                self._mark_stream_update('trades', s)
+            for s, trades in message.get('update', {}).items():
+                pair = self.get_pair(s)
+                for d in trades:
+                    pair._add_trade(d['t'] / 1000, float(d['p']), float(d['q']))
+                self._mark_stream_update('trades', s)
+
+    def _on_stream_disconnect(self):
+        super()._on_stream_disconnect()
+        self._live_orderbooks = {}
+
+    @property
+    def trading_stream_ready(self):
+        """Orders are placed and cancelled over the trading websocket, REST is used otherwise."""
+        return self._trading_logged_in and self._trading_stream is not None and self._trading_stream.connected
+
+    async def _run_trading_stream(self):
+        self._trading_stream = WSStream(self._session, self._ws_trading_endpoint, self._handle_trading_message,
+                                        on_connect=self._login_trading_stream,
+                                        on_disconnect=self._on_trading_stream_disconnect)
+        await self._trading_stream.run()
+
+    async def _login_trading_stream(self):
+        """Authenticate the trading session once per connection."""
+        response = await self._trading_stream.request({'method': 'login',
+                                                       'params': {'type': 'BASIC', 'api_key': self._api_key,
+                                                                  'secret_key': self._secret_key}})
+        if response.get('result') is not True:
+            raise ConnectionError(f'Trading websocket login failed: {response.get("error")}')
+        self._trading_logged_in = True
+        self.logger.info('Trading websocket logged in.')
+        response = await self._trading_stream.request({'method': 'spot_subscribe', 'params': {}})
+        if response.get('result') is not True:
+            self.logger.error(f'Execution reports subscription failed: {response.get("error")}')
+            return
+        self._order_stream_session += 1
+        self._order_reports_ready = True
+        response = await self._trading_stream.request({'method': 'spot_balance_subscribe',
+                                                       'params': {'mode': 'updates'}})
+        if response.get('result') is not True:
+            self.logger.error(f'Balance subscription failed: {response.get("error")}')
+            return
+        self._balance_stream_session += 1
+        self._balance_reports_ready = True
+
+    def _on_trading_stream_disconnect(self):
+        self._trading_logged_in = False
+        self._order_reports_ready = False
+        self._balance_reports_ready = False
+
+    def _handle_trading_message(self, message: dict):
+        """Push execution reports into the order handler and balances into the balance handler.
+        Args:
+            message (dict): spot_orders snapshot, spot_order update or spot_balance notification.
+        """
+        method = message.get('method')
+        if method == 'spot_balance':
+            self._push_balance_updates({b['currency']: float(b['available']) for b in message['params']
+                                        if b['currency'] in self._tokens})
+            return
+        elif method == 'spot_order':
+            reports = [message['params']]
+        elif method == 'spot_orders':
+            reports = message['params']
+        else:
+            if 'error' in message:
+                self.logger.error(f'Trading stream error: {message["error"]}')
+            return
+        self._push_order_updates([self._modify_order_model(r) for r in reports
+                                  if r['symbol'] in self._trading_pairs])
+
+    async def _trading_request(self, method: str, params: dict):
+        """Send an order request over the trading websocket.
+        Returns:
+            report (dict): order report, None if the request failed or its outcome is unknown.
+        """
+        await self.rate_limiter.acquire('trading', priority=0)
+        try:
+            response = await self._trading_stream.request({'method': method, 'params': params})
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            # Not retried over REST, the order may have reached the exchange
+            self.logger.warning(f'{method} {params.get("client_order_id")} failed on the trading websocket: {e!r}')
+            return None
+        if 'error' in response:
+            self.logger.error(f'{method} {params.get("client_order_id")} rejected: {response["error"]}')
+            return None
+        return response['result']
+
+    def _resync_orderbook(self, symbol: str):
+        """Drop the live orderbook of a symbol and request a fresh snapshot.
+        REST polling serves the symbol until the snapshot arrives.
+        """
+        self._live_orderbooks.pop(symbol, None)
+        self._stream_ready.discard(('orderbook', symbol))
+
+        async def resubscribe():
+            await self._ws_stream.send({'method': 'unsubscribe', 'ch': self._orderbook_channel,
+                                        'params': {'symbols': [symbol]}})
+            await self._ws_stream.send({'method': 'subscribe', 'ch': self._orderbook_channel,
+                                        'params': {'symbols': list(self.trading_pairs)}})
+        asyncio.ensure_future(resubscribe())
+
     async def _get_commission(self, symbols: List[str]) -> dict:
         """Get taker and maker rate for symbols.
         Args:
@@ -288,130 +588,30 @@ class FMFWConnector(BaseConnector):
             # READ DATA FROM CONFIG
             pass
     
-    @time_out
     async def _curl(self, path: str, auth:bool=False, verb: str = None,
-                    query: dict = None, post_dict: dict = None, attribute: str = None, retry_count: int = 0):
-        """Send a request to Server."""
+                    query: dict = None, post_dict: dict = None, attribute: str = None, response_type=None):
+        """Send a request to Server.
+        Args:
+            response_type (type): expected structure of the response, lets the decoder parse numbers directly.
+        """
         if not verb:
             verb = 'GET'
         if auth:
-            headers = _build_headers(self._api_key, self._secret_key)
+            headers = self._auth_headers
         else:
             headers = {}
-        max_retries = self._retries  # set max retry number
         # create URL FMFW
         url = self._api_endpoint + path
         if attribute:
             url += attribute
         if query:
             url += '?' + urlencode(query)
-        response = None
-
-        async def retry():
-            r = await self._curl(path, auth, verb, query, post_dict, attribute, retry_count + 1)
-            return r
 
-        try:
-            # logger needed here.
-            if verb == 'GET':
-                async with self._session.get(url, headers=headers) as resp:
-                    resp.raise_for_status()
-                    response = await resp.text()
-            elif verb == 'POST':
-                async with self._session.post(url, headers=headers, data=post_dict) as resp:
-                    resp.raise_for_status()
-                    response = await resp.text()
-            elif verb == 'PATCH':
-                async with self._session.patch(url, headers=headers, data=post_dict) as resp:
-                    resp.raise_for_status()
-                    response = await resp.text()
-            elif verb == 'PUT':
-                async with self._session.put(url, headers=headers, data=post_dict) as resp:
-                    resp.raise_for_status()
-                    response = await resp.text()
-            elif verb == 'DELETE':
-                async with self._session.delete(url, headers=headers, data=post_dict) as resp:
-                    resp.raise_for_status()
-                    response = await resp.text()
-        
-        except aiohttp.ClientResponseError as e:
-            """
-            HTTP Status Codes ::
-            200 OK. Successful request
-            400 Bad Request. Returns JSON with the error message
-            401 Unauthorized. Authorization is required or has been failed
-            403 Forbidden. Action is forbidden
-            404 Not Found. Data requested cannot be found
-            429 Too Many Requests. Your connection has been rate limited
-            500 Internal Server. Internal Server Error
-            503 Service Unavailable. Service is down for maintenance
-            504 Gateway Timeout. Request timeout expired
-            """
-            resp_status = resp.status
-            if response is None:
-                raise e
-
-            # 400 Bad Request. Returns JSON with the error message
-            if resp_status == 400:
-                self.logger.error('Bad Request.')
-                if retry_count < max_retries:
-                    return await retry()
-                else:
-                    return None
-
-            # 401 Unauthorized. Authorization is required or has been failed
-            elif resp_status == 401:
-                self.logger.error("API Key or Secret incorrect, please check and restart.")
-                raise e
-
-            # 403 Forbidden. Action is forbidden
-            elif resp_status == 403:
-                self.logger.error("Forbidden. Please restart.")
-                raise e
-
-            # 404 Not Found. Data requested cannot be found
-            elif resp_status == 404:
-                self.logger.error("Unable to contact the   API (404).")
-                if retry_count < max_retries:
-                    return await retry()
-                else:
-                    return None
-
-            # 429 Too Many Requests. Your connection has been rate limited
-            elif resp_status == 429:
-                self.logger.error("Ratelimited on current request. Sleeping, then trying again.")
-                if retry_count < max_retries:
-                    return await retry()
-                else:
-                    return None
-
-            # 500 Internal Server. Internal Server Error
-            elif resp_status == 500:
-                self.logger.error("Internal Server Error")
-                raise e
-
-            # 503 Service Unavailable. Service is down for maintenance
-            elif resp_status == 503:
-                self.logger.warning("Unable to contact the API (503), retrying. ")
-                if retry_count < max_retries:
-                    return await retry()
-                else:
-                    return None
-
-            # 504 Gateway Timeout. Request timeout expired
-            elif resp_status == 504:
-                self.logger.error("Request timeout expired")
-                if retry_count < max_retries:
-                    return await retry()
-                else:
-                    return None
-            else:
-                raise e
-        
-        except Exception as e:
-            raise e
+        response = await self._request(path, verb, auth, lambda: (url, headers, post_dict))
+        if response is None:
+            return None
         if query:
             self.logger.info(f'Successful {verb} request with query {query}')
         else:
             self.logger.info(f'Successful {verb} request with post_dict {post_dict}')
-        return json.loads(response)
+        return self._decoder.decode(response, response_type)
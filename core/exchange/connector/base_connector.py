@@ -1,11 +1,18 @@
 from abc import ABC, abstractmethod
+import aiohttp
+import asyncio
 from decimal import Decimal
 import importlib
-from typing import Tuple, List
+import time
+from typing import Callable, Tuple, List
 
 import global_settings
-from core.entities import OrderBook, SpotOrder, Account
-from core.utils import setup_custom_logger
+from core.entities import OrderBook, OrderStatus, SpotOrder, Account
+from core.exchange.connector.http_transport import HttpTransport
+from core.exchange.connector.json_decoder import JsonDecoder
+from core.exchange.connector.rate_limiter import RateLimiter
+from core.exchange.connector.retry_policy import RetryPolicy, RetryAction, parse_retry_after
+from core.utils import setup_custom_logger, gather_bounded, time_out
 
 class MarketInfo:
     def __init__(self, exchange: str, trading_pair: str, base_asset: str, quote_asset: str):
@@ -31,8 +38,7 @@ class BaseConnector(ABC):
         # EXCHANGE PARAMETERS
         # Some of this parameters won't be necessary in some cases
         self._rate_limit: int = None  # Rate limit per second
-        self._order_limit: int = None  # Trading requests limit per second, all other requests = 20
-        self._weight_limit: int = None
+        self._weight_limit: int = None  # Request weight per second, for exchanges limiting by weight instead
         self._tick_size: Decimal = None
         self._quote_precision: int = None
         self._quantity_increment: Decimal = None
@@ -46,8 +52,23 @@ class BaseConnector(ABC):
         self._secret_key = None
 
         # ATTRIBUTES
-        self._session = None
+        self._transport = HttpTransport.shared()
+        self._decoder = JsonDecoder()
+        self._rate_limiter = None
+        self._retry_policy = RetryPolicy({429: RetryAction.RETRY, 502: RetryAction.RETRY,
+                                          503: RetryAction.RETRY, 504: RetryAction.RETRY})
+        self._status_messages = {}  # HTTP status to error message logged when a request fails
         self._ws_available: bool = False
+        self._replace_available: bool = False  # orders can be amended in one request
+        self._ws_stream = None
+        self._stream_ready = set()  # (channel, symbol) received since the stream last connected
+        self._stream_updated_at = {}  # channel to perf counter of its last stream message
+        self._order_update_handler = None  # called with SpotOrder reports pushed by the exchange
+        self._order_reports_ready = False
+        self._order_stream_session = 0  # incremented each time execution reports start streaming
+        self._balance_update_handler = None  # called with balances pushed by the exchange
+        self._balance_reports_ready = False
+        self._balance_stream_session = 0  # incremented each time balance updates start streaming
         self.logger = setup_custom_logger(__name__, log_level=global_settings.LOG_LEVEL)
         self._orders_manager: dict = {}
         self._inventory_balance: dict = None
@@ -67,6 +88,68 @@ class BaseConnector(ABC):
     def tokens(self):
         return self._tokens
 
+    @property
+    def transport(self):
+        return self._transport
+
+    @property
+    def _session(self):
+        return self._transport.session
+
+    @property
+    def ws_available(self):
+        return self._ws_available and global_settings.WS_ENABLED
+
+    @property
+    def replace_available(self):
+        return self._replace_available
+
+    @property
+    def polling_rate_limit(self):
+        """Requests, or request weight, per second available to data polling."""
+        return self._weight_limit or self._rate_limit
+
+    @property
+    def rate_limiter(self):
+        """Token buckets enforcing the exchange limits, built on first use."""
+        if self._rate_limiter is None:
+            self._rate_limiter = RateLimiter(self._rate_limits())
+        return self._rate_limiter
+
+    def _rate_limits(self):
+        """Requests, or request weight, per second of each endpoint class."""
+        return {'default': self._weight_limit or self._rate_limit}
+
+    def _endpoint_class(self, path: str, verb: str):
+        """Endpoint class a request is counted against."""
+        return 'default'
+
+    def _request_weight(self, path: str, verb: str):
+        """Rate limit tokens a request costs, 1 unless the exchange weighs its endpoints."""
+        return 1
+
+    async def _throttle(self, path: str, verb: str, auth: bool = False):
+        """Wait for rate limit tokens before sending a request. Signed order writes are served first.
+        Returns:
+            key (str): endpoint class the request was counted against.
+        """
+        key = self._endpoint_class(path, verb)
+        priority = 0 if auth and verb != 'GET' else 1
+        await self.rate_limiter.acquire(key, weight=self._request_weight(path, verb), priority=priority)
+        return key
+
+    def reset_retry_budget(self):
+        """Refill the retry budget, called once per exchange loop."""
+        self._retry_policy.reset_budget()
+
+    def polling_cost(self, data_type: str, n_orders: int = 0):
+        """Number of requests one refresh of a data type takes.
+        Args:
+            data_type (str): orderbook, ticker, orders or inventory.
+            n_orders (int): number of tracked orders.
+        """
+        return 1
+
     @classmethod
     def _initialize_connector(cls, exchange: str):
         cls_name = cls.__name__
@@ -82,6 +165,11 @@ class BaseConnector(ABC):
 
     def register_account(self, account: Account):
         self._api_key, self._secret_key = account.get_login_info()
+        self._prepare_auth()
+
+    def _prepare_auth(self):
+        """Build the signing state reused by every signed request once the keys are known."""
+        pass
 
     async def get_inventory_balance(self):
         res = await self._get_inventory_balance()
@@ -110,6 +198,15 @@ class BaseConnector(ABC):
             self.logger.info(f'Successfully fetch candles data of symbols {",".join(self.trading_pairs)}')
             return res
 
+    async def get_candle_history(self, period: str = 'M1', limit: int = global_settings.CANDLE_BACKFILL_LIMIT):
+        res = await self._get_candle_history(period, limit)
+        if res is None or len(res) < 1:
+            self.logger.warning(f'Fail to fetch {period} candle history of symbols {",".join(self.trading_pairs)}')
+            return None
+        else:
+            self.logger.info(f'Successfully fetch {period} candle history of symbols {",".join(self.trading_pairs)}')
+            return res
+
     async def get_tickers(self):
         res = await self._get_tickers()
         if res is None or len(res) < 1:
@@ -126,11 +223,35 @@ class BaseConnector(ABC):
         else:
             return res
 
-    async def cancel_spot_orders(self, spot_orders:List[SpotOrder]):
+    async def cancel_spot_orders(self, spot_orders:List[SpotOrder], cancel_all_symbols: List[str] = None):
+        """Cancel orders concurrently.
+        Args:
+            spot_orders (List[SpotOrder]): orders to cancel.
+            cancel_all_symbols (List[str]): symbols whose orders are all being cancelled, pulled with
+                one cancel-all request each where the exchange has one.
+        Returns:
+            spot_orders (List[SpotOrder]): cancelled orders, cancel-all may also report orders not in the input.
+        """
         if not spot_orders:
             return []
-        else:
-            return await self._cancel_spot_orders(spot_orders)
+        cancel_all_symbols = set(cancel_all_symbols or [])
+        by_symbol = {}
+        single = []
+        for spot_order in spot_orders:
+            symbol = spot_order.pair.trading_pair
+            if symbol in cancel_all_symbols:
+                by_symbol.setdefault(symbol, []).append(spot_order)
+            else:
+                single.append(spot_order)
+
+        async def cancel_symbol(symbol, symbol_orders):
+            res = await self._cancel_all_spot_orders(symbol)
+            if res is None:
+                res = await self._cancel_spot_orders(symbol_orders)
+            return res
+        results = await asyncio.gather(self._cancel_spot_orders(single),
+                                       *[cancel_symbol(s, o) for s, o in by_symbol.items()])
+        return [spot_order for res in results for spot_order in res]
 
     async def create_spot_order(self, spot_order: SpotOrder):
         return await self._create_spot_order(spot_order)
@@ -138,10 +259,146 @@ class BaseConnector(ABC):
     async def create_spot_orders(self, spot_orders:List[SpotOrder]):
         if not spot_orders:
             return []
-        else:
-            return await self._create_spot_orders(spot_orders)
-    
+        created = await self._create_spot_orders(spot_orders)
+        created_ids = {spot_order.order_id for spot_order in created}
+        failed = [spot_order for spot_order in spot_orders if spot_order.order_id not in created_ids]
+        open_orders = await self._find_open_orders(failed)
+        for spot_order in failed:
+            report = open_orders.get(spot_order.order_id)
+            if report is not None:
+                self.logger.warning(f'Order {spot_order.order_id} is open although its request failed.')
+                self._copy_report(spot_order, report)
+                created.append(spot_order)
+        return created
+
+    async def _find_open_orders(self, spot_orders: List[SpotOrder]):
+        """Look up orders whose request failed among the open orders, by client order id.
+        A timed out order write may still have reached the exchange and is not sent again.
+        Returns:
+            open_orders (dict): client order id to the open order report.
+        """
+        if not spot_orders:
+            return {}
+        order_ids = {spot_order.order_id for spot_order in spot_orders}
+        active_orders = await self._get_active_spot_orders()
+        return {report.order_id: report for report in active_orders or [] if report.order_id in order_ids}
+
+    @staticmethod
+    def _copy_report(spot_order: SpotOrder, report: SpotOrder):
+        spot_order.status = report.status
+        spot_order.quantity_cumulative = report.quantity_cumulative
+        spot_order.created_at = report.created_at
+        spot_order.updated_at = report.updated_at
+
+    async def replace_spot_orders(self, replacements: List[Tuple[SpotOrder, SpotOrder]]):
+        """Amend orders concurrently, each live order is swapped for its replacing order in one request.
+        Args:
+            replacements (List[Tuple[SpotOrder, SpotOrder]]): (live order, replacing order).
+        Returns:
+            replacements (List[Tuple[SpotOrder, SpotOrder]]): pairs that were replaced.
+        """
+        if not replacements:
+            return []
+        results = await self._fan_out([self._replace_spot_order(spot_order, new_order)
+                                       for spot_order, new_order in replacements],
+                                      [spot_order.order_id for spot_order, _ in replacements],
+                                      limit=len(replacements))
+        replaced = {order_id for order_id, _ in results}
+        open_orders = await self._find_open_orders([new_order for spot_order, new_order in replacements
+                                                     if spot_order.order_id not in replaced])
+        for spot_order, new_order in replacements:
+            report = open_orders.get(new_order.order_id)
+            if report is not None:
+                self.logger.warning(f'Order {new_order.order_id} is open although the replace of '
+                                    f'{spot_order.order_id} failed.')
+                spot_order.status = OrderStatus.CANCELED
+                self._copy_report(new_order, report)
+                replaced.add(spot_order.order_id)
+        return [(spot_order, new_order) for spot_order, new_order in replacements if spot_order.order_id in replaced]
+
     async def query_orders(self, spot_orders:List[SpotOrder]):
+        if not spot_orders:
+            return []
+        else:
+            return await self._query_orders(spot_orders)
+
+    async def run_market_stream(self):
+        """Stream orderbooks, tickers and trades into pairs until cancelled."""
+        if not self.ws_available:
+            return
+        await self._run_market_stream()
+
+    def market_stream_ready(self, channel: str):
+        """Check whether the market stream currently serves a channel for every trading pair.
+        Args:
+            channel (str): orderbook, ticker or trades.
+        Returns:
+            ready (bool): False if REST polling is still required.
+        """
+        if self._ws_stream is None or not self._ws_stream.connected:
+            return False
+        return all((channel, symbol) in self._stream_ready for symbol in self._trading_pairs)
+
+    def stream_age(self, channel: str):
+        """Seconds since the last stream message of a channel, None if never."""
+        updated_at = self._stream_updated_at.get(channel)
+        if updated_at is None:
+            return None
+        return time.perf_counter() - updated_at
+
+    def _mark_stream_update(self, channel: str, symbol: str):
+        self._stream_ready.add((channel, symbol))
+        self._stream_updated_at[channel] = time.perf_counter()
+
+    def _on_stream_disconnect(self):
+        self._stream_ready = set()
+
+    async def _run_market_stream(self):
+        pass
+
+    def register_order_handler(self, handler):
+        """Register the callback receiving streamed execution reports as a list of SpotOrder."""
+        self._order_update_handler = handler
+
+    @property
+    def order_stream_session(self):
+        """Counter of execution report subscriptions, None while reports are not streamed.
+        Orders must be polled once per session to catch changes made while the stream was down.
+        """
+        if self._order_reports_ready:
+            return self._order_stream_session
+        return None
+
+    def _push_order_updates(self, spot_orders: List[SpotOrder]):
+        if spot_orders and self._order_update_handler is not None:
+            self._order_update_handler(spot_orders)
+
+    def register_balance_handler(self, handler):
+        """Register the callback receiving streamed balances as a dict of token to available balance.
+        Updates are partial, tokens missing from an update did not change.
+        """
+        self._balance_update_handler = handler
+
+    @property
+    def balance_stream_session(self):
+        """Counter of balance subscriptions, None while balances are not streamed.
+        Balances must be polled once per session to catch changes made while the stream was down.
+        """
+        if self._balance_reports_ready:
+            return self._balance_stream_session
+        return None
+
+    def _push_balance_updates(self, balances: dict):
+        if balances and self._balance_update_handler is not None:
+            self._balance_update_handler(balances)
+
+    async def run_trading_stream(self):
+        """Keep an authenticated order entry session open until cancelled, orders go over REST without it."""
+        if not self.ws_available or not global_settings.WS_TRADING_ENABLED:
+            return
+        await self._run_trading_stream()
+
+    async def _run_trading_stream(self):
         pass
 
     @abstractmethod
@@ -168,12 +425,34 @@ class BaseConnector(ABC):
     async def _get_trading_candles(self, symbols: List[str], period: str = 'M1'):
         pass
 
+    # @abstractmethod
+    async def _get_candle_history(self, period: str, limit: int):
+        pass
+
     @abstractmethod
     async def _get_tickers(self, symbols: List[str]):
         pass
 
-    # @abstractmethod
     async def _query_orders(self, spot_orders:List[SpotOrder]):
+        """Diff tracked orders against the open orders, only orders no longer open are queried one by one.
+        Args:
+            spot_orders (List[SpotOrder]): tracked orders.
+        Returns:
+            spot_orders (List[SpotOrder]): open order reports and final state of closed orders, None if
+                open orders could not be fetched.
+        """
+        open_orders = await self._get_active_spot_orders()
+        if open_orders is None:
+            return None
+        tracked_ids = {spot_order.order_id for spot_order in spot_orders}
+        reports = [spot_order for spot_order in open_orders if spot_order.order_id in tracked_ids]
+        open_ids = {spot_order.order_id for spot_order in reports}
+        closed = [spot_order for spot_order in spot_orders if spot_order.order_id not in open_ids]
+        results = await self._fan_out([self._query_order(spot_order) for spot_order in closed],
+                                      [spot_order.order_id for spot_order in closed])
+        return reports + [spot_order for _, spot_order in results]
+
+    async def _query_order(self, spot_order: SpotOrder):
         pass
 
     @abstractmethod
@@ -181,13 +460,37 @@ class BaseConnector(ABC):
         pass
 
     # @abstractmethod
-    async def _cancel_all_spot_orders(self):
+    async def _cancel_all_spot_orders(self, symbol: str):
+        """Cancel every open order of a symbol with one request, None if the exchange has no such endpoint."""
         pass
 
     @abstractmethod
     async def _cancel_spot_order(self, client_order_id: str):
         pass
 
+    # @abstractmethod
+    async def _replace_spot_order(self, spot_order: SpotOrder, new_order: SpotOrder):
+        """Amend a live order into a new one, None if it failed or the exchange cannot amend orders."""
+        pass
+
+    async def _fan_out(self, coroutines, keys, limit: int = None):
+        """Await requests concurrently with bounded concurrency.
+        Args:
+            coroutines (List): request coroutines.
+            keys (List): symbol or order id of each request, for logging.
+            limit (int): maximum requests in flight, defaults to MAX_CONCURRENT_REQUESTS.
+        Returns:
+            results (List[Tuple]): (key, result) of successful requests, failures are logged and skipped.
+        """
+        results = await gather_bounded(coroutines, limit)
+        data = []
+        for key, res in zip(keys, results):
+            if isinstance(res, Exception):
+                self.logger.warning(f'Request for {key} failed: {res!r}')
+            elif res is not None:
+                data.append((key, res))
+        return data
+
     def get_pair(self, symbol: str):
         idx = self._trading_pairs.index(symbol)
         return self._pairs[idx]
@@ -205,7 +508,63 @@ class BaseConnector(ABC):
         tickDec = Decimal(str(tickSize))
         return Decimal(round(num / tickSize, 0)) * tickDec
 
+    @time_out
+    async def _send(self, verb: str, url: str, headers: dict, data=None):
+        """Send a single request, returns the response body or None on time out."""
+        return await self._transport.request(verb, url, headers, data)
+
+    async def _request(self, path: str, verb: str, auth: bool, prepare: Callable):
+        """Send a request, retrying failed attempts as the retry policy rules.
+        Args:
+            path (str): endpoint path, used for rate limiting and logging.
+            verb (str): HTTP method.
+            auth (bool): signed request.
+            prepare (Callable): returns (url, headers, data) of an attempt, called again on each retry.
+        Returns:
+            response (bytes): response body, None if the request failed.
+        """
+        attempt = 0
+        while True:
+            limit_key = await self._throttle(path, verb, auth)
+            url, headers, data = prepare()
+            error = None
+            status = None
+            retry_after = None
+            sent = True
+            try:
+                response = await self._send(verb, url, headers, data)
+                if response is not None:
+                    return response
+                self.logger.warning(f'{verb} {path} timed out.')
+            except aiohttp.ClientResponseError as e:
+                error = e
+                status = e.status
+                if e.headers is not None:
+                    retry_after = parse_retry_after(e.headers.get('Retry-After'))
+                self.logger.error(self._status_messages.get(status, f'{verb} {path} failed with status {status}.'))
+            except aiohttp.ClientConnectorError as e:
+                sent = False  # No connection was made, the exchange never saw the request
+                self.logger.warning(f'{verb} {path} failed: {e!r}')
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self.logger.warning(f'{verb} {path} failed: {e!r}')
+
+            # Order writes with an unknown outcome are not sent again, callers reconcile them by client order id
+            action = self._retry_policy.action(status, idempotent=verb == 'GET' or not sent)
+            if action == RetryAction.RAISE:
+                raise error
+            elif action == RetryAction.FAIL:
+                return None
+            delay = self._retry_policy.backoff(attempt, retry_after)
+            if status == 429:
+                self.rate_limiter.penalize(limit_key, retry_after or 1)
+            if delay is None:
+                self.logger.warning(f'Giving up {verb} {path} after {attempt + 1} attempts.')
+                return None
+            self.logger.info(f'Retrying {verb} {path} in {delay:.2f}s.')
+            await asyncio.sleep(delay)
+            attempt += 1
+
     @abstractmethod
     async def _curl(self, path: str, auth: bool = False, verb: str = None,
-                    query: dict = None, post_dict: dict = None, attribute: str = None, retry_count: int = 0):
+                    query: dict = None, post_dict: dict = None, attribute: str = None, response_type=None):
         pass
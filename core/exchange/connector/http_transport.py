@@ -0,0 +1,90 @@
+import ssl
+import time
+from typing import Callable, List
+
+import aiohttp
+
+import global_settings
+
+_ssl_context = None
+
+
+def _shared_ssl_context():
+    """One SSL context for every connection, certificates are loaded once."""
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+class HttpTransport:
+    """Pooled aiohttp session shared by every connector of the process.
+
+    Connections are kept alive and DNS lookups cached, so TCP and TLS setup is
+    paid once per host instead of once per request. The session is opened by
+    the first exchange entering the transport and closed by the last one leaving.
+    """
+
+    _shared = None
+
+    def __init__(self):
+        self._session: aiohttp.ClientSession = None
+        self._users = 0
+        self._timing_hooks: List[Callable[[str, str, int, float], None]] = []
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @property
+    def session(self):
+        return self._session
+
+    def add_timing_hook(self, hook: Callable[[str, str, int, float], None]):
+        """Register a callback run after every request.
+        Args:
+            hook (Callable): called with verb, url, status and elapsed seconds, status is None on a connection error.
+        """
+        self._timing_hooks.append(hook)
+
+    def _create_session(self):
+        connector = aiohttp.TCPConnector(limit=global_settings.HTTP_POOL_LIMIT,
+                                         limit_per_host=global_settings.HTTP_POOL_LIMIT_PER_HOST,
+                                         keepalive_timeout=global_settings.HTTP_KEEPALIVE_TIMEOUT,
+                                         ttl_dns_cache=global_settings.HTTP_DNS_CACHE_TTL,
+                                         ssl=_shared_ssl_context())
+        timeout = aiohttp.ClientTimeout(total=global_settings.TIME_OUT)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def __aenter__(self):
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        self._users += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._users -= 1
+        if self._users == 0 and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(self, verb: str, url: str, headers: dict = None, data=None):
+        """Send a request on a pooled connection.
+        Returns:
+            response (bytes): raw response body.
+        Raises:
+            aiohttp.ClientResponseError: on a non 2xx status.
+        """
+        status = None
+        start = time.perf_counter()
+        try:
+            async with self._session.request(verb, url, headers=headers, data=data) as resp:
+                status = resp.status
+                resp.raise_for_status()
+                return await resp.read()
+        finally:
+            elapsed = time.perf_counter() - start
+            for hook in self._timing_hooks:
+                hook(verb, url, status, elapsed)
@@ -0,0 +1,68 @@
+import json
+
+import global_settings
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonDecoder:
+    """Decode response bytes with the fastest JSON library installed.
+
+    msgspec is preferred as it can decode straight into a typed structure,
+    converting numeric strings to floats on the way. orjson and the stdlib
+    return plain objects and ignore the requested type.
+    """
+
+    def __init__(self, backend: str = None):
+        """
+        Args:
+            backend (str): msgspec, orjson or json, defaults to the first one installed.
+        """
+        backend = backend or global_settings.JSON_DECODER
+        if backend == 'auto':
+            if msgspec is not None:
+                backend = 'msgspec'
+            elif orjson is not None:
+                backend = 'orjson'
+            else:
+                backend = 'json'
+        if (backend == 'msgspec' and msgspec is None) or (backend == 'orjson' and orjson is None):
+            raise ImportError(f'JSON decoder {backend} is not installed.')
+        self._backend = backend
+        self._typed_decoders = {}
+
+    @property
+    def backend(self):
+        return self._backend
+
+    def _typed_decoder(self, response_type):
+        decoder = self._typed_decoders.get(response_type)
+        if decoder is None:
+            decoder = msgspec.json.Decoder(response_type, strict=False)
+            self._typed_decoders[response_type] = decoder
+        return decoder
+
+    def decode(self, data, response_type=None):
+        """
+        Args:
+            data (bytes | str): JSON document.
+            response_type (type): expected structure, used by msgspec only.
+        Returns:
+            Decoded object.
+        """
+        if self._backend == 'msgspec':
+            if response_type is not None:
+                return self._typed_decoder(response_type).decode(data)
+            return msgspec.json.decode(data)
+        elif self._backend == 'orjson':
+            return orjson.loads(data)
+        else:
+            return json.loads(data)
@@ -0,0 +1,114 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate` tokens per second.
+
+    Callers queue by priority then arrival, only the head of the queue may take
+    tokens so a heavy request is not starved by a stream of light ones.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate (float): tokens added per second.
+            capacity (float): maximum burst, defaults to one second of tokens.
+        """
+        self._rate = rate
+        self._capacity = capacity or rate
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0
+        self._waiters = []  # heap of [priority, arrival, event]
+        self._counter = itertools.count()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def _refill(self):
+        now = time.monotonic()
+        if now < self._paused_until:
+            self._updated_at = now
+            return
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    def _wait_time(self, weight: float):
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        return (weight - self._tokens) / self._rate
+
+    def _wake_head(self):
+        if self._waiters:
+            self._waiters[0][2].set()
+
+    async def acquire(self, weight: float = 1, priority: int = 0):
+        """Wait until `weight` tokens are available and take them.
+        Args:
+            weight (float): tokens the request costs.
+            priority (int): lower is served first.
+        """
+        weight = min(weight, self._capacity)
+        waiter = [priority, next(self._counter), asyncio.Event()]
+        heapq.heappush(self._waiters, waiter)
+        try:
+            while True:
+                event = waiter[2]
+                if self._waiters[0] is waiter:
+                    self._refill()
+                    if self._tokens >= weight:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= weight
+                        self._wake_head()
+                        return
+                    event.clear()
+                    try:
+                        # Woken early if a higher priority request takes the head
+                        await asyncio.wait_for(event.wait(), self._wait_time(weight))
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await event.wait()
+                    event.clear()
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+                self._wake_head()
+            raise
+
+    def penalize(self, seconds: float):
+        """Empty the bucket and stop refilling for `seconds`, e.g. after a 429."""
+        self._tokens = 0
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._updated_at = time.monotonic()
+
+
+class RateLimiter:
+    """One token bucket per endpoint class, e.g. market, trading and other."""
+
+    def __init__(self, limits: Dict[str, float]):
+        """
+        Args:
+            limits (dict): endpoint class to requests per second.
+        """
+        self._buckets = {key: TokenBucket(rate) for key, rate in limits.items()}
+
+    def bucket(self, key: str) -> TokenBucket:
+        return self._buckets[key]
+
+    async def acquire(self, key: str, weight: float = 1, priority: int = 0):
+        await self._buckets[key].acquire(weight, priority)
+
+    def penalize(self, key: str, seconds: float):
+        self._buckets[key].penalize(seconds)
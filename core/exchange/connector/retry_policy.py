@@ -0,0 +1,96 @@
+import datetime as dt
+from email.utils import parsedate_to_datetime
+from enum import Enum
+import random
+from typing import Dict
+
+import global_settings
+
+
+class RetryAction(Enum):
+    RETRY = 'RETRY'  # Back off then send again
+    FAIL = 'FAIL'    # Give up, the request returns None
+    RAISE = 'RAISE'  # Re-raise the response error to the caller
+
+
+def parse_retry_after(value: str):
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - dt.datetime.now(dt.timezone.utc)).total_seconds(), 0)
+
+
+class RetryPolicy:
+    """Per-status retry rules with capped exponential backoff and full jitter.
+
+    Retries draw from a budget that is refilled once per exchange loop, so an
+    outage costs at most `budget` extra requests per loop however many calls fail.
+    """
+
+    def __init__(self, rules: Dict[int, RetryAction],
+                 default: RetryAction = RetryAction.FAIL,
+                 max_retries: int = None,
+                 base_delay: float = None,
+                 max_delay: float = None,
+                 budget: int = None):
+        """
+        Args:
+            rules (dict): HTTP status to RetryAction.
+            default (RetryAction): action for statuses without a rule.
+            max_retries (int): retries per request.
+            base_delay (float): delay before the first retry, in seconds.
+            max_delay (float): cap of a single delay, in seconds.
+            budget (int): retries allowed per loop.
+        """
+        self._rules = rules
+        self._default = default
+        self._max_retries = global_settings.RETRY_NUM if max_retries is None else max_retries
+        self._base_delay = base_delay or global_settings.RETRY_BASE_DELAY
+        self._max_delay = max_delay or global_settings.RETRY_MAX_DELAY
+        self._budget = global_settings.RETRY_BUDGET if budget is None else budget
+        self._budget_left = self._budget
+
+    @property
+    def budget_left(self):
+        return self._budget_left
+
+    def reset_budget(self):
+        self._budget_left = self._budget
+
+    def action(self, status: int = None, idempotent: bool = True) -> RetryAction:
+        """Action for a failed attempt.
+        Args:
+            status (int): HTTP status, None for a timeout or a connection error.
+            idempotent (bool): the request can be sent twice safely. Otherwise a failure that may
+                have reached the exchange is not retried, as a second order write could be executed.
+        """
+        if status is None or status == 504:
+            return RetryAction.RETRY if idempotent else RetryAction.FAIL
+        return self._rules.get(status, self._default)
+
+    def backoff(self, attempt: int, retry_after: float = None):
+        """Delay before retry number `attempt` + 1.
+        Args:
+            attempt (int): retries already made for the request.
+            retry_after (float): delay asked by the server, in seconds.
+        Returns:
+            delay (float): seconds to sleep, None if the request should give up.
+        """
+        if attempt >= self._max_retries or self._budget_left <= 0:
+            return None
+        if retry_after is not None:
+            if retry_after > self._max_delay:
+                return None
+            delay = retry_after
+        else:
+            delay = random.uniform(0, min(self._max_delay, self._base_delay * 2 ** attempt))
+        self._budget_left -= 1
+        return delay
@@ -0,0 +1,145 @@
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, List
+
+import aiohttp
+
+import global_settings
+from core.exchange.connector.json_decoder import JsonDecoder
+from core.utils import setup_custom_logger
+
+
+class WSStream:
+    """Persistent websocket connection with automatic reconnect and resubscribe.
+
+    Every message passed to `subscribe` is remembered and sent again after each
+    reconnect, so channel owners never have to track the connection state.
+    Messages sent with `request` are correlated to their response by id.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession,
+                 endpoint: str,
+                 on_message: Callable[[dict], None],
+                 on_connect: Callable[[], Awaitable] = None,
+                 on_disconnect: Callable[[], None] = None):
+        self._session = session
+        self._endpoint = endpoint
+        self._on_message = on_message
+        self._on_connect = on_connect
+        self._on_disconnect = on_disconnect
+        self._subscriptions: List[dict] = []
+        self._ws: aiohttp.ClientWebSocketResponse = None
+        self._request_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}  # request id to future of its response
+        self._decoder = JsonDecoder()
+        self._enabled = True
+        self.logger = setup_custom_logger(__name__, log_level=global_settings.LOG_LEVEL)
+
+    @property
+    def connected(self):
+        return self._ws is not None and not self._ws.closed
+
+    def _next_id(self):
+        self._request_id += 1
+        return self._request_id
+
+    async def send(self, message: dict):
+        """Send a message if connected.
+        Args:
+            message (dict): JSON serializable message.
+        Returns:
+            sent (bool): False if the stream is currently down.
+        """
+        if not self.connected:
+            return False
+        if 'id' not in message:
+            message['id'] = self._next_id()
+        await self._ws.send_str(json.dumps(message))
+        return True
+
+    async def request(self, message: dict, timeout: float = None):
+        """Send a message and wait for the response carrying the same id.
+        Args:
+            message (dict): JSON serializable message, its id is assigned here.
+            timeout (float): seconds to wait, defaults to TIME_OUT.
+        Returns:
+            response (dict): decoded response, may hold an error.
+        Raises:
+            ConnectionError: the stream is down or dropped before the response.
+            asyncio.TimeoutError: no response in time.
+        """
+        if not self.connected:
+            raise ConnectionError(f'Websocket {self._endpoint} is not connected.')
+        message = dict(message)
+        request_id = self._next_id()
+        message['id'] = request_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._ws.send_str(json.dumps(message))
+            return await asyncio.wait_for(future, timeout or global_settings.TIME_OUT)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def subscribe(self, message: dict):
+        """Register a subscription, sent now if connected and again on every reconnect."""
+        self._subscriptions.append(message)
+        await self.send(dict(message))
+
+    async def run(self):
+        """Keep the connection open until `close` is called."""
+        delay = global_settings.WS_RECONNECT_INTERVAL
+        while self._enabled:
+            try:
+                async with self._session.ws_connect(self._endpoint, heartbeat=global_settings.WS_HEARTBEAT) as ws:
+                    self._ws = ws
+                    self.logger.info(f'Websocket connected to {self._endpoint}')
+                    # Read from the start so on_connect can wait for responses, e.g. a login
+                    reader = asyncio.ensure_future(self._read(ws))
+                    try:
+                        if self._on_connect is not None:
+                            await self._on_connect()
+                        for message in self._subscriptions:
+                            await self.send(dict(message))
+                        delay = global_settings.WS_RECONNECT_INTERVAL
+                        await reader
+                    finally:
+                        reader.cancel()
+            except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError) as e:
+                self.logger.warning(f'Websocket {self._endpoint} error: {e}')
+            except Exception as e:
+                # Anything else, e.g. from on_connect, drops this connection only, the stream keeps reconnecting
+                self.logger.exception(f'Websocket {self._endpoint} unexpected error: {e}')
+            finally:
+                self._ws = None
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError(f'Websocket {self._endpoint} disconnected.'))
+                if self._on_disconnect is not None:
+                    self._on_disconnect()
+            if self._enabled:
+                self.logger.warning(f'Websocket {self._endpoint} disconnected, reconnecting in {delay}s.')
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, global_settings.WS_MAX_RECONNECT_INTERVAL)
+
+    async def _read(self, ws: aiohttp.ClientWebSocketResponse):
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                try:
+                    message = self._decoder.decode(msg.data)
+                    future = self._pending.get(message.get('id')) if isinstance(message, dict) else None
+                    if future is not None:
+                        if not future.done():
+                            future.set_result(message)
+                    else:
+                        self._on_message(message)
+                except Exception as e:
+                    # A bad message or a failing handler must not take the connection down
+                    self.logger.exception(f'Websocket {self._endpoint} failed to handle message: {e}')
+            elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED):
+                break
+
+    async def close(self):
+        self._enabled = False
+        if self._ws is not None:
+            await self._ws.close()
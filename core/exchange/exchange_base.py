@@ -1,14 +1,19 @@
 from abc import ABCMeta
-from aiohttp import ClientSession
 import asyncio
+from collections import deque
 from enum import Enum, IntEnum
 import json
+import threading
 from typing import List
 import time
 
 from core.entities import Account, Pair, MarketInfo, SpotOrder, Inventory,TradeSide, OrderStatus
 from core import utils
+from core.exchange.loop_timer import LoopTimer
 from core.exchange.order_manger import OrderManager
+from core.exchange.quote_engine import QuoteReconciler
+from core.exchange.scheduler import DataType, RefreshScheduler
+from core.exchange.snapshot import MarketSnapshot
 from core.exchange.connector import BaseConnector
 import global_settings
 
@@ -29,6 +34,13 @@ class ProcessingStatus(Enum):
     PROCESSING = 'PROCESSING'
     PROCESSED_ERROR = 'PROCESSED_ERROR'
 
+class ActionPhase(Enum):
+    WAITING_DATA = 'WAITING_DATA'          # Waiting for the first refresh of the loop
+    WAITING_STRATEGY = 'WAITING_STRATEGY'  # Data handed to the strategy
+    SUBMITTING = 'SUBMITTING'              # Sending cancels, creates and replacements
+    DONE = 'DONE'                          # Orders handled for this loop
+    MISSED = 'MISSED'                      # Loop deadline passed before data or strategy were ready
+
 class IExchange(metaclass=ABCMeta):
 
     def __init__(self, market_info: MarketInfo):
@@ -71,6 +83,21 @@ class IExchange(metaclass=ABCMeta):
         self._cancel_orders = []
 
         # Process status
+        self._strategy_wakeups: List[threading.Event] = []  # set when the strategy has work or the exchange stops
+        self._async_strategy = None  # strategy awaited on the exchange loop instead of a thread
+        self._ready_for_strategy = BasicStatus.NOT_READY
+        self._exchange_enabled = True
+        self._event_loop: asyncio.AbstractEventLoop = None
+        self._fetch_done = asyncio.Event()
+        self._strategy_done = asyncio.Event()
+        self._loop_deadline = asyncio.Event()
+        self._fetch_data_status = ProcessingStatus.PROCESSING
+        self._strategy_calculation_status = ProcessingStatus.PROCESSING
+        self._main_process_status = ProcessingStatus.INITIALIZING
+        self._action_phase: ActionPhase = None
+        self._phase_history = deque(maxlen=global_settings.PHASE_HISTORY_LENGTH)  # (perf counter, ActionPhase)
+        self._loop_timer = LoopTimer()
+        self._action_deadline = None  # deadline of the loop the running action phase belongs to
         self.MARKET_READY = MarketStatus.NOT_READY  # Initialize basic market data to be ready.
         self.FETCH_DATA_STATUS = ProcessingStatus.PROCESSING  # Fetching data status.
         self.STRATEGY_CALCULATION_STATUS = ProcessingStatus.PROCESSING
@@ -82,6 +109,121 @@ class IExchange(metaclass=ABCMeta):
         # Enable loop
         self.EXCHANGE_ENABLED = True
 
+    @property
+    def READY_FOR_STRATEGY(self):
+        return self._ready_for_strategy
+
+    @READY_FOR_STRATEGY.setter
+    def READY_FOR_STRATEGY(self, status: BasicStatus):
+        notify = status == BasicStatus.READY and self._ready_for_strategy != BasicStatus.READY
+        self._ready_for_strategy = status
+        if notify:
+            self._wake_strategies()
+
+    @property
+    def FETCH_DATA_STATUS(self):
+        return self._fetch_data_status
+
+    @FETCH_DATA_STATUS.setter
+    def FETCH_DATA_STATUS(self, status: ProcessingStatus):
+        self._fetch_data_status = status
+        self._set_event(self._fetch_done, status == ProcessingStatus.PROCESSED)
+
+    @property
+    def STRATEGY_CALCULATION_STATUS(self):
+        return self._strategy_calculation_status
+
+    @STRATEGY_CALCULATION_STATUS.setter
+    def STRATEGY_CALCULATION_STATUS(self, status: ProcessingStatus):
+        # Set from the strategy thread
+        self._strategy_calculation_status = status
+        self._set_event(self._strategy_done, status == ProcessingStatus.PROCESSED)
+
+    @property
+    def MAIN_PROCESS_STATUS(self):
+        return self._main_process_status
+
+    @MAIN_PROCESS_STATUS.setter
+    def MAIN_PROCESS_STATUS(self, status: ProcessingStatus):
+        self._main_process_status = status
+        self._set_event(self._loop_deadline, status == ProcessingStatus.PROCESSED)
+
+    @property
+    def action_phase(self):
+        return self._action_phase
+
+    @property
+    def loop_timer(self):
+        return self._loop_timer
+
+    @property
+    def phase_history(self):
+        """Latest action phase transitions as (perf counter, ActionPhase), oldest first."""
+        return list(self._phase_history)
+
+    def _set_phase(self, phase: ActionPhase):
+        now = time.perf_counter()
+        if self._phase_history:
+            started_at, previous = self._phase_history[-1]
+            if previous not in (ActionPhase.DONE, ActionPhase.MISSED):
+                self._loop_timer.record(previous.value, now - started_at, self._action_deadline, now)
+        self._action_phase = phase
+        self._phase_history.append((now, phase))
+        self.logger.debug(f'Action phase {phase.value}.')
+
+    def _set_event(self, event: asyncio.Event, value: bool):
+        """Set or clear an event of the exchange loop from any thread."""
+        action = event.set if value else event.clear
+        loop = self._event_loop
+        if loop is None or loop.is_closed():
+            action()
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            action()
+        else:
+            loop.call_soon_threadsafe(action)
+
+    async def _wait_for(self, event: asyncio.Event):
+        """Wait for an event of the current loop.
+        Returns:
+            done (bool): False if the loop deadline passed first.
+        """
+        if event.is_set():
+            return True
+        waiters = [asyncio.create_task(event.wait()), asyncio.create_task(self._loop_deadline.wait())]
+        _, pending = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in pending:
+            waiter.cancel()
+        return event.is_set()
+
+    @property
+    def EXCHANGE_ENABLED(self):
+        return self._exchange_enabled
+
+    @EXCHANGE_ENABLED.setter
+    def EXCHANGE_ENABLED(self, enabled: bool):
+        self._exchange_enabled = enabled
+        if not enabled:
+            self._wake_strategies()
+
+    def register_strategy_wakeup(self, event: threading.Event):
+        """Register an event set from the exchange loop when fresh data is ready for the strategy
+        or the exchange stops, so strategy threads sleep instead of polling status flags.
+        """
+        self._strategy_wakeups.append(event)
+
+    def _wake_strategies(self):
+        for event in self._strategy_wakeups:
+            event.set()
+
+    def register_async_strategy(self, strategy):
+        """Register a strategy whose on_tick coroutine is awaited by the exchange loop each tick."""
+        self._async_strategy = strategy
+
 
 class SpotExchange(IExchange):
 
@@ -89,6 +231,13 @@ class SpotExchange(IExchange):
         super().__init__(market_info)
         self._initialize(market_info)
         self._order_manager = OrderManager(self)
+        self._connector.register_order_handler(self._order_manager._update_state)
+        self._scheduler = RefreshScheduler(self._connector.polling_rate_limit)
+        self._quote_reconciler = QuoteReconciler()
+        self._last_mids = {}  # trading pair to mid price at the end of the previous loop
+        self._connector.register_balance_handler(self._update_streamed_balances)
+        self._orders_synced_session = None  # order stream session covered by the last orders poll
+        self._balances_synced_session = None  # balance stream session covered by the last inventory poll
 
     @property
     def exchange_name(self):
@@ -186,17 +335,22 @@ class SpotExchange(IExchange):
         :param spot_orders: List[SpotOrder]
         :return: List of spot orders created.
         """
-        # This will be written in numpy later to improve performance.
         self.logger.info(f'Try to create multiple orders on {self.exchange_name} Exchange.')
-        list_trading_pairs = []
-        for spot_order in spot_orders:
-            p = spot_order.pair
-            b = p.base_asset
-            q = p.quote_asset
-            list_trading_pairs.append((b, q))
-            spot_order.order_id = self.OrderManager._create_id()
-            spot_order.status = OrderStatus.NEW
-        trading_pairs = list(set(list_trading_pairs))
+        if not self._check_inventory(spot_orders):
+            return False
+        self._queue_spot_orders(spot_orders)
+
+    def _check_inventory(self, spot_orders: List[SpotOrder], released: List[SpotOrder] = ()):
+        """Check the available inventory covers new orders, pair by pair.
+        Args:
+            spot_orders (List[SpotOrder]): orders to be placed.
+            released (List[SpotOrder]): live orders given up by the same requests, e.g. amended ones,
+                their remaining quantity is available again.
+        Returns:
+            covered (bool): False if the buy or sell volume of a pair exceeds the inventory.
+        """
+        # This will be written in numpy later to improve performance.
+        trading_pairs = list(set((spot_order.pair.base_asset, spot_order.pair.quote_asset) for spot_order in spot_orders))
         for p in trading_pairs:
             sum_buy = 0
             sum_sell = 0
@@ -206,8 +360,15 @@ class SpotExchange(IExchange):
                         sum_buy += spot_order.quantity * spot_order.price
                     else:
                         sum_sell += spot_order.quantity
+            for spot_order in released:
+                if spot_order.pair.trading_pair == p[0] + p[1]:
+                    remaining = spot_order.quantity - spot_order.quantity_cumulative
+                    if spot_order.side == TradeSide.BUY:
+                        sum_buy -= remaining * spot_order.price
+                    else:
+                        sum_sell -= remaining
 
-            if float(sum_buy) * global_settings.BUFFER_ORDER_QUANTITY >= self.inventory.get_single_balance(p[1]):
+            if sum_buy > 0 and float(sum_buy) * global_settings.BUFFER_ORDER_QUANTITY >= self.inventory.get_single_balance(p[1]):
                 self.logger.error(f'Buy order quantity for pair {p[0] + p[1]} larger than current inventory. '
                                   f'Buy volume: {float(sum_buy) * global_settings.BUFFER_ORDER_QUANTITY}')
                 return False
@@ -215,61 +376,192 @@ class SpotExchange(IExchange):
                 self.logger.error(f'Sell order quantity for pair {p[0] + p[1]} larger than current inventory. '
                                   f'Sell volume: {sum_sell}')
                 return False
+        return True
 
+    def _queue_spot_orders(self, spot_orders: List[SpotOrder]):
+        """Assign ids to orders already checked against the inventory and queue them for posting."""
+        for spot_order in spot_orders:
+            spot_order.order_id = self.OrderManager._create_id()
+            spot_order.status = OrderStatus.NEW
         for spot_order in spot_orders:
             self.logger.info(f'Posting a {spot_order.side} {spot_order.order_type} '
                          f'order of pair {spot_order.pair.trading_pair} with volume {spot_order.quantity} and price {spot_order.price}')
         self.OrderManager._add_post_orders(spot_orders)
 
+    def quote(self, spot_orders: List[SpotOrder]):
+        """Requote towards a target ladder with the fewest order requests.
+        Live orders matching a target are kept, the others are amended where the exchange
+        can, cancelled and placed again otherwise. Pairs without a target are left untouched.
+
+        Nothing is queued unless the inventory covers the new and amended orders.
+
+        :param spot_orders: List[SpotOrder], target ladder.
+        :return: dict of pair to QuoteDiff, False if the inventory does not cover the quotes.
+        """
+        diffs = {}
+        creates = []
+        discards = []
+        for pair in self._pairs:
+            targets = [spot_order for spot_order in spot_orders if spot_order.pair is pair]
+            if not targets:
+                continue
+            om = self.OrderManager(pair)
+            initialized = om._initialized_orders
+            diff = self._quote_reconciler.reconcile(targets, om.active_orders + initialized,
+                                                    pair.tick_size, pair.quantity_increment,
+                                                    self._connector.replace_available)
+            # Orders not posted yet are dropped instead of cancelled or amended
+            initialized_ids = {spot_order.order_id for spot_order in initialized}
+            replacements = []
+            for spot_order, new_order in diff.replace:
+                if spot_order.order_id in initialized_ids:
+                    diff.cancel.append(spot_order)
+                    diff.create.append(new_order)
+                else:
+                    replacements.append((spot_order, new_order))
+            diff.replace = replacements
+            discards.extend(o for o in diff.cancel if o.order_id in initialized_ids)
+            creates.extend(diff.create)
+            diffs[pair] = diff
+        replaced = [spot_order for diff in diffs.values() for spot_order, _ in diff.replace]
+        if not self._check_inventory(creates + [new_order for diff in diffs.values() for _, new_order in diff.replace],
+                                     replaced):
+            return False
+        # Discarded orders were never posted, so they are not counted as released above
+        self.OrderManager._discard_initialized_orders(discards)
+        discard_ids = {spot_order.order_id for spot_order in discards}
+        for pair, diff in diffs.items():
+            for _, new_order in diff.replace:
+                new_order.order_id = self.OrderManager._create_id()
+                new_order.status = OrderStatus.NEW
+            self.OrderManager._add_cancel_orders([o for o in diff.cancel if o.order_id not in discard_ids])
+            self.OrderManager._add_replace_orders(diff.replace)
+            self.logger.info(f'Requote {pair.trading_pair}: {diff}')
+        if creates:
+            self._queue_spot_orders(creates)
+        return diffs
+
     async def _run(self):
-        async with ClientSession() as self._connector._session:
+        self._event_loop = asyncio.get_running_loop()
+        async with self._connector.transport:
+            stream_tasks = []
+            if self.WS_AVAILABLE:
+                stream_tasks.append(asyncio.create_task(self._connector.run_market_stream()))
+                if not self.READ_ONLY:
+                    stream_tasks.append(asyncio.create_task(self._connector.run_trading_stream()))
+            pending_action = None
+            n_loops = 0
             while self.EXCHANGE_ENABLED:
-                tasks = []
                 st_time = time.perf_counter()
+                deadline = self._loop_timer.start_loop()
+                self._connector.reset_retry_budget()
                 loop_sleep = asyncio.create_task(self._loop_interval())
                 task_fetch_data = asyncio.create_task(self._fetch_data_process())
-                task_process_action = asyncio.create_task(self._handle_strategy_action())
-                tasks.append(loop_sleep)
-                tasks.append(task_fetch_data)
-                tasks.append(task_process_action)
-                await asyncio.gather(*tasks)
+                task_process_action = asyncio.create_task(self._handle_strategy_action(pending_action))
+                await asyncio.gather(loop_sleep, task_fetch_data)
+                # Orders still being sent overlap the fetch of the next loop
+                pending_action = None if task_process_action.done() else task_process_action
+                self._loop_timer.record('LOOP', time.perf_counter() - st_time, deadline)
+                self._loop_timer.adapt(self._price_move())
                 self._time_passed = time.perf_counter() - self._start_time
-                print(f'Time passed: {time.perf_counter() - st_time:.2f}s')
-
-    async def _handle_strategy_action(self):
-        while self.MAIN_PROCESS_STATUS == ProcessingStatus.PROCESSING:
-            await asyncio.sleep(0.001)
-            if self.MARKET_READY:
-                if self.FETCH_DATA_STATUS == ProcessingStatus.PROCESSED:
-                    self.READY_FOR_STRATEGY = BasicStatus.READY
-                    if self.STRATEGY_CALCULATION_STATUS == ProcessingStatus.PROCESSED:
-                        if (len(self.OrderManager._initialized_orders) < 1) and (len(self.OrderManager._cancelled_orders_list) < 1):
-                            self.PROCESS_ACTION_STATUS = ProcessingStatus.PROCESSED
-                            self.READY_FOR_STRATEGY = BasicStatus.NOT_READY
-                            return True
-                        else:
-                            self.READY_FOR_STRATEGY = BasicStatus.NOT_READY
-                            tasks = []
-                            task = asyncio.create_task(self._connector.cancel_spot_orders(self.OrderManager._cancelled_orders_list))
-                            tasks.append(task)
-                            task = asyncio.create_task(self._connector.create_spot_orders(self.OrderManager._initialized_orders))
-                            tasks.append(task)
-                            orders_cancelled = await tasks[0]
-                            orders_post = await tasks[1]
-                            self.OrderManager._cancelling_orders() # Transfer cancelling orders
-                            self.OrderManager._posting_orders()    # Transfer posting orders
-                            self.OrderManager._cancelled_orders(orders_cancelled)
-                            self.OrderManager._posted_orders(orders_post)
-                            return True
-                    else:
-                        self.PROCESS_ACTION_STATUS = ProcessingStatus.PROCESSING
-                elif self.FETCH_DATA_STATUS == ProcessingStatus.PROCESSING:
-                    self.READY_FOR_STRATEGY = BasicStatus.NOT_READY
-                    self.PROCESS_ACTION_STATUS = ProcessingStatus.PROCESSING
-                else:
-                    self.READY_FOR_STRATEGY = BasicStatus.NOT_READY
-                    self.PROCESS_ACTION_STATUS = ProcessingStatus.PROCESSING
-                    return False
+                n_loops += 1
+                if n_loops % global_settings.LOOP_STATS_EVERY == 0:
+                    self.logger.info(f'Loop stats {self.exchange_name}: {self._loop_timer.summary()}')
+            if pending_action is not None:
+                await pending_action
+            for stream_task in stream_tasks:
+                stream_task.cancel()
+
+    def _price_move(self):
+        """Largest relative mid price move across pairs since the previous loop, None before two loops."""
+        moves = []
+        for pair in self._pairs:
+            orderbook = pair.current_orderbook
+            mid = orderbook.get_mid_price if orderbook is not None else None
+            last_mid = self._last_mids.get(pair.trading_pair)
+            if mid:
+                if last_mid:
+                    moves.append(abs(mid / last_mid - 1))
+                self._last_mids[pair.trading_pair] = mid
+        return max(moves) if moves else None
+
+    async def _handle_strategy_action(self, previous_action: asyncio.Task = None):
+        """Run the action phases of one loop: wait for data, hand it to the strategy, then send its orders.
+        Each phase waits on an event, the loop deadline ends whichever phase is still waiting.
+        Args:
+            previous_action (asyncio.Task): action of the previous loop still sending orders, awaited
+                before the strategy runs again.
+        """
+        if previous_action is not None:
+            await self._wait_for(self._fetch_done)
+            await previous_action
+        self._action_deadline = self._loop_timer.deadline
+        self.PROCESS_ACTION_STATUS = ProcessingStatus.PROCESSING
+        self._set_phase(ActionPhase.WAITING_DATA)
+        if not await self._wait_for(self._fetch_done) or not self.MARKET_READY:
+            self._set_phase(ActionPhase.MISSED)
+            return False
+        self._set_phase(ActionPhase.WAITING_STRATEGY)
+        if self._async_strategy is not None:
+            strategy_done = await self._run_async_strategy()
+        else:
+            # Cleared here as well as at loop start, an action delayed by the previous one may span two loops
+            self.STRATEGY_CALCULATION_STATUS = ProcessingStatus.PROCESSING
+            self.READY_FOR_STRATEGY = BasicStatus.READY
+            strategy_done = await self._wait_for(self._strategy_done)
+            self.READY_FOR_STRATEGY = BasicStatus.NOT_READY
+        if not strategy_done:
+            self._set_phase(ActionPhase.MISSED)
+            return False
+        if (len(self.OrderManager._initialized_orders) < 1) and (len(self.OrderManager._cancelled_orders_list) < 1) \
+                and (len(self.OrderManager._replaced_orders_list) < 1):
+            self.PROCESS_ACTION_STATUS = ProcessingStatus.PROCESSED
+            self._set_phase(ActionPhase.DONE)
+            return True
+        self._set_phase(ActionPhase.SUBMITTING)
+        tasks = []
+        task = asyncio.create_task(self._connector.cancel_spot_orders(self.OrderManager._cancelled_orders_list,
+                                                                      self.OrderManager._cancel_all_symbols()))
+        tasks.append(task)
+        task = asyncio.create_task(self._connector.create_spot_orders(self.OrderManager._initialized_orders))
+        tasks.append(task)
+        task = asyncio.create_task(self._connector.replace_spot_orders(self.OrderManager._replaced_orders_list))
+        tasks.append(task)
+        # Mark the orders as sent before awaiting, reports streamed meanwhile are matched against them
+        self.OrderManager._cancelling_orders() # Transfer cancelling orders
+        self.OrderManager._posting_orders()    # Transfer posting orders
+        self.OrderManager._replacing_orders()  # Transfer replacing orders
+        orders_cancelled = await tasks[0]
+        orders_post = await tasks[1]
+        orders_replaced = await tasks[2]
+        self.OrderManager._cancelled_orders(orders_cancelled)
+        self.OrderManager._posted_orders(orders_post)
+        self.OrderManager._replaced_orders(orders_replaced)
+        self.PROCESS_ACTION_STATUS = ProcessingStatus.PROCESSED
+        self._set_phase(ActionPhase.DONE)
+        return True
+
+    def snapshot(self):
+        """Current market, inventory and order state of the exchange."""
+        return MarketSnapshot(self, time.perf_counter(), self._loop_timer.deadline)
+
+    async def _run_async_strategy(self):
+        """Await the async strategy on the exchange loop.
+        Returns:
+            done (bool): False if the strategy failed or ran past the loop deadline, its orders are then
+                sent with the next tick.
+        """
+        timeout = max(self._action_deadline - time.perf_counter(), 0) if self._action_deadline else None
+        try:
+            await asyncio.wait_for(self._async_strategy.on_tick(self.snapshot()), timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f'Strategy tick on {self.exchange_name} cancelled at the loop deadline.')
+            return False
+        except Exception as e:
+            self.logger.exception(f'Strategy tick on {self.exchange_name} failed: {e!r}')
+            return False
+        self.change_strategy_status()
+        return True
 
     async def _fetch_data_process(self):
         tasks = []
@@ -279,7 +571,7 @@ class SpotExchange(IExchange):
             tasks.append(task)
             task = asyncio.create_task(self._connector.get_order_book())
             tasks.append(task)
-            task = asyncio.create_task(self._connector.get_trading_candles())
+            task = asyncio.create_task(self._backfill_candles())
             tasks.append(task)
             task = asyncio.create_task(self._connector.get_tickers())
             tasks.append(task)
@@ -308,69 +600,145 @@ class SpotExchange(IExchange):
             # Set maker and taker rates, orderbooks, trading candles, tickers.
             for pair in self._pairs:
                 pair._add_orderbook(orderbook_res.get(pair.trading_pair))
-                pair._add_trading_candles(candles_res.get(pair.trading_pair))
+                for period_candles in candles_res.values():
+                    for price_candles in period_candles.get(pair.trading_pair, []):
+                        pair._add_trading_candles(price_candles)
                 pair._add_tickers(tickers_res.get(pair.trading_pair))
             # Update inventory
             self._inventory.update_inventory(inventory_res)
             # Update active orders
             self.OrderManager._insert_active_orders(active_orders_res)
+            for data_type in DataType:
+                self._scheduler.mark_requested(data_type, 0)
+                self._scheduler.mark_refreshed(data_type)
             self.MARKET_READY = MarketStatus.READY
             self.logger.info(f'Exchange {self.exchange_name} ready.')
             self.FETCH_DATA_STATUS = ProcessingStatus.PROCESSED
             return True
         else:
-            task = asyncio.create_task(self._connector.get_inventory_balance())
-            tasks.append(task)
-            task = asyncio.create_task(self._connector.get_order_book())
-            tasks.append(task)
-            task = asyncio.create_task(self._connector.get_trading_candles())
-            tasks.append(task)
-            task = asyncio.create_task(self._connector.get_tickers())
-            tasks.append(task)
-            task = asyncio.create_task(self._connector.query_orders(self.OrderManager._tracked_orders))
-            tasks.append(task)
-
-            inventory_res = await tasks[0]
-            orderbook_res = await tasks[1]
-            candles_res = await tasks[2]
-            tickers_res = await tasks[3]
-            tracked_orders_res = await tasks[4]
-
-            if inventory_res is None:
-                self.logger.warning('Market not ready, no inventory data. Retrying...')
-                return False
-            else:
-                self._inventory.update_inventory(inventory_res)
-            
-            if len(orderbook_res) > 0:
+            # Strategy starts once the first refresh of the loop is done, the
+            # scheduler keeps data fresh until the loop interval ends.
+            await self._refresh_due_data()
+            if self._connector.market_stream_ready('orderbook'):
                 for pair in self._pairs:
-                    pair._add_orderbook(orderbook_res.get(pair.trading_pair))
-            else:
-                self.logger.warning('No data for orderbook.')
-            
-            if len(candles_res) > 0:
-                for pair in self._pairs:
-                    pair._add_trading_candles(candles_res.get(pair.trading_pair))
-            else:
-                self.logger.warning('No data for candles.')
-            
-            if len(tickers_res) > 0:
-                for pair in self._pairs:
-                    pair._add_tickers(tickers_res.get(pair.trading_pair))
-            else:
-                self.logger.warning('No data for tickers.')
-            self.OrderManager._update_state(tracked_orders_res)
-
+                    pair._record_orderbook()
             self.FETCH_DATA_STATUS = ProcessingStatus.PROCESSED
+            while self.MAIN_PROCESS_STATUS == ProcessingStatus.PROCESSING:
+                try:
+                    await asyncio.wait_for(self._loop_deadline.wait(),
+                                           self._scheduler.next_due_in(self._request_cost, self._served_by_stream))
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                await self._refresh_due_data()
             return True
 
+    def data_age(self, data_type: DataType):
+        """Seconds since a data type was last refreshed, by the market stream or by polling.
+        Args:
+            data_type (DataType): data type.
+        Returns:
+            age (float): None if never refreshed.
+        """
+        ages = [self._scheduler.age(data_type)]
+        if data_type in (DataType.ORDERBOOK, DataType.TICKER):
+            ages.append(self._connector.stream_age(data_type.value))
+        ages = [age for age in ages if age is not None]
+        return min(ages) if ages else None
+
+    def _served_by_stream(self, data_type: DataType):
+        if data_type in (DataType.ORDERBOOK, DataType.TICKER):
+            return self._connector.market_stream_ready(data_type.value)
+        elif data_type == DataType.ORDERS:
+            # Poll once after each (re)subscription to catch fills missed while the stream was down
+            session = self._connector.order_stream_session
+            return session is not None and session == self._orders_synced_session
+        return False
+
+    def _update_streamed_balances(self, balances: dict):
+        self._inventory.update_inventory(balances, partial=True)
+        self._scheduler.mark_refreshed(DataType.INVENTORY)
+
+    def _sync_inventory_interval(self):
+        """Poll balances at a low frequency to reconcile the balance stream, at the normal interval without it."""
+        session = self._connector.balance_stream_session
+        if session is not None and session == self._balances_synced_session:
+            interval = global_settings.BALANCE_RECONCILE_INTERVAL
+        else:
+            interval = global_settings.REFRESH_INTERVALS[DataType.INVENTORY.value]
+        self._scheduler.set_interval(DataType.INVENTORY, interval)
+
+    def _request_cost(self, data_type: DataType):
+        return self._connector.polling_cost(data_type.value, len(self.OrderManager._tracked_orders))
+
+    async def _fetch_data_type(self, data_type: DataType):
+        if data_type == DataType.ORDERBOOK:
+            return await self._connector.get_order_book()
+        elif data_type == DataType.TICKER:
+            return await self._connector.get_tickers()
+        elif data_type == DataType.INVENTORY:
+            return await self._connector.get_inventory_balance()
+        else:
+            return await self._connector.query_orders(self.OrderManager._tracked_orders)
+
+    def _apply_data_type(self, data_type: DataType, res):
+        if data_type == DataType.ORDERBOOK:
+            for pair in self._pairs:
+                pair._add_orderbook(res.get(pair.trading_pair))
+        elif data_type == DataType.TICKER:
+            stream_trades = self._connector.market_stream_ready('trades')
+            for pair in self._pairs:
+                pair._add_tickers(res.get(pair.trading_pair))
+                if not stream_trades:
+                    pair._add_ticker_candles(res.get(pair.trading_pair))
+        elif data_type == DataType.INVENTORY:
+            self._inventory.update_inventory(res)
+        else:
+            self.OrderManager._update_state(res)
+
+    async def _refresh_due_data(self):
+        """Poll every data type whose refresh interval elapsed and that the market stream does not serve."""
+        self._sync_inventory_interval()
+        data_types = self._scheduler.due(self._request_cost, self._served_by_stream)
+        if not data_types:
+            return
+        tasks = []
+        order_session = self._connector.order_stream_session
+        balance_session = self._connector.balance_stream_session
+        for data_type in data_types:
+            self._scheduler.mark_requested(data_type, self._request_cost(data_type))
+            tasks.append(asyncio.create_task(self._fetch_data_type(data_type)))
+        results = await asyncio.gather(*tasks)
+        for data_type, res in zip(data_types, results):
+            if res is None:
+                if data_type != DataType.ORDERS:
+                    self.logger.warning(f'No data for {data_type.value}.')
+                continue
+            self._apply_data_type(data_type, res)
+            self._scheduler.mark_refreshed(data_type)
+            if data_type == DataType.ORDERS:
+                self._orders_synced_session = order_session
+            elif data_type == DataType.INVENTORY:
+                self._balances_synced_session = balance_session
+
+    async def _backfill_candles(self):
+        """Fetch candle history of every period once at startup, candles are built locally afterwards.
+        Returns:
+            candles (dict): period to dict of symbol with List of PriceCandles, None if any period failed.
+        """
+        periods = global_settings.CANDLE_PERIODS
+        results = await asyncio.gather(*[self._connector.get_candle_history(period) for period in periods])
+        if any(res is None for res in results):
+            return None
+        return dict(zip(periods, results))
+
     async def _loop_interval(self):
         self._loop_start_time = time.perf_counter()
         self.logger.info('Start new loop')
         self.MAIN_PROCESS_STATUS = ProcessingStatus.PROCESSING
         self.STRATEGY_CALCULATION_STATUS = ProcessingStatus.PROCESSING
         self.READY_FOR_STRATEGY = BasicStatus.NOT_READY
-        await asyncio.sleep(global_settings.LOOP_INTERVAL)
+        await self._loop_timer.sleep_until_deadline()
         self.MAIN_PROCESS_STATUS = ProcessingStatus.PROCESSED
         self.logger.info('End loop')
         return 1
@@ -395,7 +763,7 @@ class SpotExchange(IExchange):
         """
         connector = BaseConnector._initialize_connector(exchange_name)
         self._connector = connector()
-        # self.WS_AVAILABLE = self._connector._ws_available
+        self.WS_AVAILABLE = self._connector.ws_available
 
     def _configure_exchange(self, exchange_name: str):
         """
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from typing import Dict
+
+import global_settings
+
+
+class PhaseStats:
+    """Durations of one loop phase and how often it ended past its loop deadline."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+        self.overruns = 0
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.
+
+    def add(self, duration: float, overrun: bool):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        if overrun:
+            self.overruns += 1
+
+    def __repr__(self) -> str:
+        return f'mean {self.mean * 1000:.1f}ms max {self.max * 1000:.1f}ms overruns {self.overruns}/{self.count}'
+
+
+class LoopTimer:
+    """Deadline based clock of the exchange loop.
+
+    Each loop ends on a deadline one interval after the previous one, so a slow
+    loop shortens the next sleep instead of pushing every later loop back. The
+    interval tightens when prices move fast and backs off when the market is quiet.
+    """
+
+    OVERRUN_SLACK = 0.005  # Lateness not counted as an overrun, event loop wakeups land just after deadlines
+
+    def __init__(self, interval: float = None, min_interval: float = None, max_interval: float = None):
+        """
+        Args:
+            interval (float): initial loop interval, in seconds.
+            min_interval (float): shortest interval in volatile markets, in seconds.
+            max_interval (float): longest interval in quiet markets, in seconds.
+        """
+        self._interval = interval or global_settings.LOOP_INTERVAL
+        self._min_interval = min_interval or global_settings.LOOP_INTERVAL_MIN
+        self._max_interval = max_interval or global_settings.LOOP_INTERVAL_MAX
+        self._deadline = None
+        self._skipped = 0
+        self._stats: Dict[str, PhaseStats] = {}
+
+    @property
+    def interval(self):
+        return self._interval
+
+    @property
+    def deadline(self):
+        """perf counter at which the current loop ends."""
+        return self._deadline
+
+    @property
+    def skipped(self):
+        """Loops dropped because the previous one ran past the next deadline."""
+        return self._skipped
+
+    @property
+    def stats(self):
+        return self._stats
+
+    def start_loop(self):
+        """Set the deadline of a new loop.
+        Returns:
+            deadline (float): perf counter at which the loop ends.
+        """
+        now = time.perf_counter()
+        if self._deadline is None:
+            self._deadline = now + self._interval
+            return self._deadline
+        deadline = self._deadline + self._interval
+        if deadline <= now:
+            # Too late for the next slot, restart the schedule instead of running back to back loops
+            self._skipped += 1
+            deadline = now + self._interval
+        self._deadline = deadline
+        return deadline
+
+    async def sleep_until_deadline(self):
+        await asyncio.sleep(max(self._deadline - time.perf_counter(), 0))
+
+    def record(self, phase: str, duration: float, deadline: float, end: float = None):
+        """Account the duration of a phase.
+        Args:
+            phase (str): phase name.
+            duration (float): phase duration, in seconds.
+            deadline (float): deadline of the loop the phase belongs to.
+            end (float): perf counter at which the phase ended, defaults to now.
+        """
+        end = time.perf_counter() if end is None else end
+        self._stats.setdefault(phase, PhaseStats()).add(duration, deadline is not None and end > deadline + self.OVERRUN_SLACK)
+
+    def adapt(self, price_move: float):
+        """Tighten or relax the interval from the largest relative mid price move of the last loop."""
+        if price_move is None:
+            return
+        if price_move >= global_settings.LOOP_VOLATILE_MOVE:
+            self._interval = max(self._min_interval, self._interval / 2)
+        elif price_move <= global_settings.LOOP_QUIET_MOVE:
+            self._interval = min(self._max_interval, self._interval * 1.25)
+
+    def summary(self):
+        phases = ', '.join(f'{phase}: {stats}' for phase, stats in self._stats.items())
+        return f'interval {self._interval:.2f}s, skipped {self._skipped}, {phases}'
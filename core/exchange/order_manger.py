@@ -1,6 +1,6 @@
 import uuid
 from enum import Enum
-from typing import List
+from typing import List, Tuple
 
 from core.entities import SpotOrder, OrderStatus, Pair
 from core.utils.exception import InsufficientOrdersException
@@ -12,6 +12,8 @@ class ActiveStatus(Enum):
     ACTIVE = 'ACTIVE'
     CANCELLED_LIST = 'CANCELLED_LIST'
     HANGING_CANCELLING = 'HANGING_CANCELLING'
+    REPLACED_LIST = 'REPLACED_LIST'
+    HANGING_REPLACING = 'HANGING_REPLACING'
     COMPLETED = 'COMPLETED'
 
 class SubOrderManager:
@@ -21,6 +23,8 @@ class SubOrderManager:
         self._order_active_status = {}
         self._tracked_orders = {}
         self._back_log = {}
+        self._replacements = {}  # order id of a live order to the order replacing it
+        self._pending_reports = {}  # order id of an order being sent to its latest streamed report
 
     @property
     def pair(self) -> Pair:
@@ -54,10 +58,24 @@ class SubOrderManager:
     def _cancelled_orders(self)-> List[SpotOrder]:
         return list(self._orders[ActiveStatus.CANCELLED_LIST].values())
     
+    @property
+    def _replaced_orders(self) -> List[Tuple[SpotOrder, SpotOrder]]:
+        return [(spot_order, self._replacements[order_id])
+                for order_id, spot_order in self._orders[ActiveStatus.REPLACED_LIST].items()]
+
     @property
     def tracked_orders(self) -> List[SpotOrder]:
         return list(self._tracked_orders.values())
 
+    @property
+    def _cancelling_all(self) -> bool:
+        """Every open order of the pair is being cancelled and none is being posted or replaced."""
+        return (len(self._orders[ActiveStatus.CANCELLED_LIST]) > 0
+                and len(self._orders[ActiveStatus.ACTIVE]) == 0
+                and len(self._orders[ActiveStatus.INITIALIZED]) == 0
+                and len(self._orders[ActiveStatus.HANGING_POSTING]) == 0
+                and len(self._orders[ActiveStatus.REPLACED_LIST]) == 0)
+
     def _add_post_order(self, spot_orders: List[SpotOrder]):
         if not spot_orders:
             return
@@ -84,10 +102,12 @@ class SubOrderManager:
                 if status != OrderStatus.CANCELED or status != OrderStatus.FILLED:
                     self.__change_state(spot_order, ActiveStatus.ACTIVE)
                     self._tracked_orders[spot_order.order_id] = spot_order
+                    self._apply_pending_report(spot_order.order_id)
                 else:
                     self.__change_state(spot_order,ActiveStatus.COMPLETED)
             if len(self._orders[ActiveStatus.HANGING_POSTING]) > 0:
                 for spot_order in self.hanging_posting_orders:
+                    self._pending_reports.pop(spot_order.order_id, None)
                     self.__change_state(spot_order, ActiveStatus.INITIALIZED)
                     
     def _add_cancel_order(self, spot_orders: List[SpotOrder]):
@@ -103,6 +123,52 @@ class SubOrderManager:
     def _cancel_all_orders(self):
         self._add_cancel_order(self.active_orders)
 
+    def _discard_initialized_order(self, spot_orders: List[SpotOrder]):
+        """Drop orders that were never posted."""
+        for spot_order in spot_orders:
+            order_id = spot_order.order_id
+            if self._order_active_status.get(order_id) == ActiveStatus.INITIALIZED:
+                self._orders[ActiveStatus.INITIALIZED].pop(order_id)
+                self._order_active_status.pop(order_id)
+
+    def _add_replace_order(self, replacements: List[Tuple[SpotOrder, SpotOrder]]):
+        """Queue active orders to be amended into new ones.
+        Args:
+            replacements (List[Tuple[SpotOrder, SpotOrder]]): (active order, replacing order).
+        """
+        for spot_order, new_order in replacements:
+            order_id = spot_order.order_id
+            if self._order_active_status.get(order_id) == ActiveStatus.ACTIVE:
+                self._replacements[order_id] = new_order
+                self.__change_state(spot_order, ActiveStatus.REPLACED_LIST)
+
+    def _replacing_order(self):
+        for spot_order in list(self._orders[ActiveStatus.REPLACED_LIST].values()):
+            self.__change_state(spot_order, ActiveStatus.HANGING_REPLACING)
+
+    def _replaced_order(self, replacements: List[Tuple[SpotOrder, SpotOrder]]):
+        """Track the orders that replaced others, failed replacements stay active under the old order."""
+        for spot_order, new_order in replacements or []:
+            order_id = spot_order.order_id
+            if self._order_active_status.get(order_id) != ActiveStatus.HANGING_REPLACING:
+                continue
+            self._replacements.pop(order_id, None)
+            self._tracked_orders.pop(order_id, None)
+            self.__change_state(spot_order, ActiveStatus.COMPLETED)
+            self._orders[ActiveStatus.ACTIVE][new_order.order_id] = new_order
+            self._order_active_status[new_order.order_id] = ActiveStatus.ACTIVE
+            self._tracked_orders[new_order.order_id] = new_order
+            self._apply_pending_report(new_order.order_id)
+        for spot_order in list(self._orders[ActiveStatus.HANGING_REPLACING].values()):
+            new_order = self._replacements.pop(spot_order.order_id, None)
+            if new_order is not None:
+                self._pending_reports.pop(new_order.order_id, None)
+            self.__change_state(spot_order, ActiveStatus.ACTIVE)
+            # A report may have closed the order while the replace was in flight
+            if spot_order.status == OrderStatus.CANCELED or spot_order.status == OrderStatus.FILLED:
+                self.__change_state(spot_order, ActiveStatus.COMPLETED)
+                self._tracked_orders.pop(spot_order.order_id, None)
+
     def _cancelling_order(self):
         spot_orders = self._cancelled_orders
         if not spot_orders:
@@ -115,9 +181,16 @@ class SubOrderManager:
         if not spot_orders:
             return
         else:
-            for spot_order in spot_orders:
+            for report in spot_orders:
+                # Cancel-all reports may hold orders we do not track
+                spot_order = self._tracked_orders.pop(report.order_id, None)
+                if spot_order is None:
+                    continue
+                if report is not spot_order:
+                    spot_order.status = report.status
+                    spot_order.quantity_cumulative = report.quantity_cumulative
+                    spot_order.updated_at = report.updated_at
                 self.__change_state(spot_order, ActiveStatus.COMPLETED)
-                self._tracked_orders.pop(spot_order.order_id)
             if len(self._orders[ActiveStatus.HANGING_CANCELLING]) > 0:
                 for spot_order in self.hanging_cancelling_orders:
                     self.__change_state(spot_order, ActiveStatus.CANCELLED_LIST)
@@ -170,6 +243,18 @@ class SubOrderManager:
                 order_id = spot_order.order_id
                 self._back_log.pop(order_id)
 
+    def _awaiting_tracking(self, order_id) -> bool:
+        """The order was sent but its request has not returned yet, so it is not tracked."""
+        if self._order_active_status.get(order_id) == ActiveStatus.HANGING_POSTING:
+            return True
+        return any(new_order.order_id == order_id for new_order in self._replacements.values())
+
+    def _apply_pending_report(self, order_id):
+        """Apply a report streamed before the order was tracked, unless the tracked order is further along."""
+        report = self._pending_reports.pop(order_id, None)
+        if report is not None and report.quantity_cumulative >= self._tracked_orders[order_id].quantity_cumulative:
+            self.update_state([report])
+
     def update_state(self,spot_orders:List[SpotOrder]):
         """Update states of all or some spot_orders at each interval.
         Args:
@@ -181,9 +266,22 @@ class SubOrderManager:
             if spot_order is None:
                 raise InsufficientOrdersException
             order_id = spot_order.order_id
+            tracked = self._tracked_orders.get(order_id)
+            if tracked is None:
+                # Reports can beat the response of the request sending the order, keep them until it is tracked.
+                # Others cover orders we do not track.
+                if self._awaiting_tracking(order_id):
+                    self._pending_reports[order_id] = spot_order
+                continue
+            if spot_order is not tracked:
+                tracked.status = spot_order.status
+                tracked.quantity_cumulative = spot_order.quantity_cumulative
+                tracked.updated_at = spot_order.updated_at
+                spot_order = tracked
             current_state = self._order_active_status[order_id]
-            if current_state == ActiveStatus.CANCELLED_LIST:
+            if current_state in (ActiveStatus.CANCELLED_LIST, ActiveStatus.REPLACED_LIST):
                 if spot_order.status == OrderStatus.CANCELED or spot_order.status == OrderStatus.FILLED:
+                    self._replacements.pop(order_id, None)
                     self.__change_state(spot_order, ActiveStatus.COMPLETED)
                     self._tracked_orders.pop(order_id)
             elif current_state == ActiveStatus.ACTIVE:
@@ -257,6 +355,13 @@ class OrderManager:
             spot_orders.extend(om._cancelled_orders)
         return spot_orders
     
+    @property
+    def _replaced_orders_list(self) -> List[Tuple[SpotOrder, SpotOrder]]:
+        replacements = []
+        for om in self._sub_order_managers:
+            replacements.extend(om._replaced_orders)
+        return replacements
+
     @property
     def _completed_orders(self) -> List[SpotOrder]:
         """Return all completed orders.
@@ -347,9 +452,37 @@ class OrderManager:
         for om in self._sub_order_managers:
             om._cancel_all_orders()
 
+    def _cancel_all_symbols(self) -> List[str]:
+        """Symbols whose whole book of our orders is being pulled, cancelled with one request each."""
+        return [om.pair.trading_pair for om in self._sub_order_managers if om._cancelling_all]
+
     def _cancelling_orders(self):
         for om in self._sub_order_managers:
             om._cancelling_order()
+
+    def _discard_initialized_orders(self, spot_orders: List[SpotOrder]):
+        if not spot_orders:
+            return
+        else:
+            dict_orders = self.__divide_orders(spot_orders)
+            for pair in self._pairs:
+                self.__get_subOM(pair)._discard_initialized_order(dict_orders[pair])
+
+    def _add_replace_orders(self, replacements: List[Tuple[SpotOrder, SpotOrder]]):
+        for spot_order, new_order in replacements:
+            self.__get_subOM(spot_order.pair)._add_replace_order([(spot_order, new_order)])
+
+    def _replacing_orders(self):
+        for om in self._sub_order_managers:
+            om._replacing_order()
+
+    def _replaced_orders(self, replacements: List[Tuple[SpotOrder, SpotOrder]]):
+        # Called with every pair so failed replacements return to active
+        dict_replacements = {pair: [] for pair in self._pairs}
+        for spot_order, new_order in replacements or []:
+            dict_replacements[spot_order.pair].append((spot_order, new_order))
+        for pair in self._pairs:
+            self.__get_subOM(pair)._replaced_order(dict_replacements[pair])
     
     def _cancelled_orders(self, spot_orders: List[SpotOrder]):
         if not spot_orders:
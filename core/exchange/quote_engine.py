@@ -0,0 +1,93 @@
+from typing import List, Tuple
+
+from core.entities import SpotOrder, TradeSide
+import global_settings
+
+
+class QuoteDiff:
+    """Order requests that move the live orders of a pair to a target ladder."""
+
+    def __init__(self):
+        self.keep: List[SpotOrder] = []     # live orders already matching a target
+        self.cancel: List[SpotOrder] = []   # live orders without a target
+        self.create: List[SpotOrder] = []   # targets without a live order
+        self.replace: List[Tuple[SpotOrder, SpotOrder]] = []  # (live order, target) amended in one request
+
+    @property
+    def n_requests(self):
+        return len(self.cancel) + len(self.create) + len(self.replace)
+
+    def __repr__(self) -> str:
+        return f'QuoteDiff(keep={len(self.keep)}, cancel={len(self.cancel)}, ' \
+               f'create={len(self.create)}, replace={len(self.replace)})'
+
+
+def _round_to_tick(value: float, tick: float):
+    if not tick:
+        return value
+    return round(round(value / tick) * tick, 12)
+
+
+class QuoteReconciler:
+    """Match a target ladder against live orders so only quotes that moved are sent again.
+
+    A live order is kept when its price is within the price tolerance of a target
+    on the same side and its remaining quantity within the size tolerance.
+    """
+
+    def __init__(self, price_tolerance: float = None, size_tolerance: float = None):
+        """
+        Args:
+            price_tolerance (float): relative price distance still matching a target, at least half a tick.
+            size_tolerance (float): relative remaining quantity distance still matching a target.
+        """
+        self._price_tolerance = global_settings.QUOTE_PRICE_TOLERANCE if price_tolerance is None else price_tolerance
+        self._size_tolerance = global_settings.QUOTE_SIZE_TOLERANCE if size_tolerance is None else size_tolerance
+
+    def _matches(self, live: SpotOrder, target: SpotOrder, tick_size: float):
+        price_tolerance = max(self._price_tolerance * target.price, (tick_size or 0) / 2)
+        if abs(live.price - target.price) > price_tolerance:
+            return False
+        remaining = live.quantity - live.quantity_cumulative
+        return abs(remaining - target.quantity) <= self._size_tolerance * target.quantity
+
+    def reconcile(self, targets: List[SpotOrder], live: List[SpotOrder],
+                  tick_size: float = None, quantity_increment: float = None,
+                  can_replace: bool = False) -> QuoteDiff:
+        """Work out the minimal requests to requote one pair.
+        Args:
+            targets (List[SpotOrder]): target ladder, prices and quantities are rounded in place.
+            live (List[SpotOrder]): orders resting or about to be posted.
+            tick_size (float): pair tick size.
+            quantity_increment (float): pair quantity increment.
+            can_replace (bool): the exchange amends an order in one request, otherwise moved quotes
+                are cancelled and placed again.
+        Returns:
+            diff (QuoteDiff): orders to keep, cancel, create and replace.
+        """
+        diff = QuoteDiff()
+        for target in targets:
+            target.price = _round_to_tick(target.price, tick_size)
+            target.quantity = _round_to_tick(target.quantity, quantity_increment)
+        for side in TradeSide:
+            # Best price first, so leftover quotes are paired level by level when replaced
+            descending = side == TradeSide.BUY
+            side_targets = sorted([t for t in targets if t.side == side], key=lambda o: o.price, reverse=descending)
+            unmatched = sorted([o for o in live if o.side == side], key=lambda o: o.price, reverse=descending)
+            missing = []
+            for target in side_targets:
+                candidates = [o for o in unmatched if self._matches(o, target, tick_size)]
+                if candidates:
+                    best = min(candidates, key=lambda o: abs(o.price - target.price))
+                    unmatched.remove(best)
+                    diff.keep.append(best)
+                else:
+                    missing.append(target)
+            if can_replace:
+                n_replace = min(len(unmatched), len(missing))
+                diff.replace.extend(zip(unmatched[:n_replace], missing[:n_replace]))
+                unmatched = unmatched[n_replace:]
+                missing = missing[n_replace:]
+            diff.cancel.extend(unmatched)
+            diff.create.extend(missing)
+        return diff
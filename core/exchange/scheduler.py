@@ -0,0 +1,127 @@
+from collections import deque
+from enum import Enum
+import time
+from typing import Callable, Dict, List
+
+import global_settings
+
+
+class DataType(Enum):
+    ORDERBOOK = 'orderbook'
+    TICKER = 'ticker'
+    ORDERS = 'orders'
+    INVENTORY = 'inventory'
+
+
+class RefreshScheduler:
+    """Decide which data types to poll, each on its own interval and priority.
+
+    Requests dispatched during the last second are tracked so polling never
+    exceeds its share of the connector rate limit, the rest is left for orders.
+    A type that missed a whole interval is served before the priority order, so
+    a costly high priority type cannot starve the others.
+    """
+
+    def __init__(self, rate_limit: float,
+                 intervals: Dict[str, float] = None,
+                 priorities: Dict[str, int] = None):
+        """
+        Args:
+            rate_limit (float): connector requests per second.
+            intervals (dict): data type value to refresh interval in seconds.
+            priorities (dict): data type value to priority, lower is served first.
+        """
+        intervals = intervals or global_settings.REFRESH_INTERVALS
+        priorities = priorities or global_settings.REFRESH_PRIORITIES
+        self._intervals = {d: intervals[d.value] for d in DataType}
+        self._order = sorted(DataType, key=lambda d: priorities[d.value])
+        self._budget = rate_limit * global_settings.POLLING_RATE_SHARE
+        self._last_request = {d: None for d in DataType}
+        self._last_refresh = {d: None for d in DataType}
+        self._window = deque()  # (request time, cost) of the last second
+
+    def interval(self, data_type: DataType):
+        return self._intervals[data_type]
+
+    def set_interval(self, data_type: DataType, interval: float):
+        self._intervals[data_type] = interval
+
+    def _used_budget(self, now: float):
+        while self._window and now - self._window[0][0] >= 1:
+            self._window.popleft()
+        return sum(cost for _, cost in self._window)
+
+    def _is_due(self, data_type: DataType, now: float):
+        last_request = self._last_request[data_type]
+        return last_request is None or now - last_request >= self._intervals[data_type]
+
+    def _starved(self, data_type: DataType, now: float):
+        """Missed at least one whole interval, e.g. because higher priority types used the budget."""
+        last_request = self._last_request[data_type]
+        return last_request is None or now - last_request >= 2 * self._intervals[data_type]
+
+    def _serving_order(self, now: float):
+        """Starved types first, least recently requested first, then the others by priority."""
+        starved = [d for d in self._order if self._starved(d, now)]
+        starved.sort(key=lambda d: -1 if self._last_request[d] is None else self._last_request[d])
+        return starved + [d for d in self._order if d not in starved]
+
+    def due(self, cost: Callable[[DataType], int], skip: Callable[[DataType], bool] = None) -> List[DataType]:
+        """Data types due for a refresh that fit the remaining budget.
+        Args:
+            cost (Callable): number of requests a refresh of a data type takes.
+            skip (Callable): true for data types that need no polling, e.g. served by a stream.
+        """
+        now = time.perf_counter()
+        used = self._used_budget(now)
+        data_types = []
+        for data_type in self._serving_order(now):
+            if not self._is_due(data_type, now) or (skip is not None and skip(data_type)):
+                continue
+            request_cost = cost(data_type)
+            if used + request_cost > self._budget and used > 0:
+                continue
+            used += request_cost
+            data_types.append(data_type)
+        return data_types
+
+    def next_due_in(self, cost: Callable[[DataType], int], skip: Callable[[DataType], bool] = None):
+        """Seconds until a data type is due and fits the budget.
+        Args:
+            cost (Callable): number of requests a refresh of a data type takes.
+            skip (Callable): true for data types that need no polling, e.g. served by a stream.
+        """
+        now = time.perf_counter()
+        waits = []
+        for data_type in DataType:
+            if skip is not None and skip(data_type):
+                continue
+            last_request = self._last_request[data_type]
+            if last_request is None:
+                waits.append(0)
+            else:
+                waits.append(max(last_request + self._intervals[data_type] - now, 0))
+        if not waits:
+            # Everything is streamed, check again in case a stream drops
+            return min(self._intervals.values())
+        wait = min(waits)
+        if wait == 0 and not self.due(cost, skip) and self._window:
+            # Due but over budget, wait for the oldest request to leave the window
+            wait = max(self._window[0][0] + 1 - now, 0)
+        return wait
+
+    def mark_requested(self, data_type: DataType, cost: int):
+        now = time.perf_counter()
+        self._last_request[data_type] = now
+        if cost > 0:
+            self._window.append((now, cost))
+
+    def mark_refreshed(self, data_type: DataType):
+        self._last_refresh[data_type] = time.perf_counter()
+
+    def age(self, data_type: DataType):
+        """Seconds since a data type was last refreshed, None if never."""
+        last_refresh = self._last_refresh[data_type]
+        if last_refresh is None:
+            return None
+        return time.perf_counter() - last_refresh
@@ -0,0 +1,36 @@
+from typing import Dict, List
+
+from core.entities import OrderBook, Pair, SpotOrder, Tickers
+
+
+class MarketSnapshot:
+    """Exchange state handed to an async strategy on each loop.
+
+    Orderbooks are the per-loop copies published by the pairs, other entities are
+    shared: the strategy runs on the exchange event loop so nothing changes them
+    while on_tick runs, until it awaits.
+    """
+
+    def __init__(self, exchange, timestamp: float, deadline: float):
+        """
+        Args:
+            exchange (SpotExchange): exchange the snapshot was taken from, orders are placed through it.
+            timestamp (float): perf counter at which the snapshot was taken.
+            deadline (float): perf counter at which the loop ends.
+        """
+        self.exchange = exchange
+        self.timestamp = timestamp
+        self.deadline = deadline
+        self.pairs: List[Pair] = list(exchange.pairs)
+        self.orderbooks: Dict[str, OrderBook] = {p.trading_pair: p.current_orderbook for p in self.pairs}
+        self.tickers: Dict[str, Tickers] = {p.trading_pair: p.current_ticker for p in self.pairs}
+        self.balances: dict = dict(exchange.inventory.get_current_balances)
+        self.active_orders: List[SpotOrder] = exchange.OrderManager.active_orders
+
+    @property
+    def pair(self) -> Pair:
+        return self.pairs[0]
+
+    def __repr__(self) -> str:
+        return f'MarketSnapshot({self.exchange.exchange_name}, pairs={[p.trading_pair for p in self.pairs]}, ' \
+               f'active_orders={len(self.active_orders)})'
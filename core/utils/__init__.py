@@ -1,4 +1,5 @@
 from core.utils.log import setup_custom_logger
-from core.utils.utils import to_nearest, time_out
+from core.utils.utils import to_nearest, time_out, gather_bounded
+from core.utils.ring_buffer import RingBuffer, ColumnarRingBuffer
 
-__all__ = ['to_nearest', 'setup_custom_logger', 'time_out']
\ No newline at end of file
+__all__ = ['to_nearest', 'setup_custom_logger', 'time_out', 'gather_bounded', 'RingBuffer', 'ColumnarRingBuffer']
\ No newline at end of file
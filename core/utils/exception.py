@@ -7,4 +7,12 @@ class InsufficientOrdersException(OrderException):
     pass
 
 class OrdersUpdateFailException(OrderException):
-    pass
\ No newline at end of file
+    pass
+
+class OrderBookException(Exception):
+    pass
+
+class OrderBookGapException(OrderBookException):
+    """Sequence number of an orderbook update does not follow the book, a resync is required.
+    """
+    pass
@@ -0,0 +1,122 @@
+from typing import Sequence
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity buffer of objects with O(1) append, iterated oldest first."""
+
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._items = [None] * capacity
+        self._head = 0  # Next write position
+        self._size = 0
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def __len__(self):
+        return self._size
+
+    def _position(self, i: int):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError('RingBuffer index out of range')
+        return (self._head - self._size + i) % self._capacity
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._items[self._position(j)] for j in range(*i.indices(self._size))]
+        return self._items[self._position(i)]
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self._items[(self._head - self._size + i) % self._capacity]
+
+    def append(self, item):
+        self._items[self._head] = item
+        self._head = (self._head + 1) % self._capacity
+        if self._size < self._capacity:
+            self._size += 1
+
+    def last(self, n: int):
+        """Return the latest n items, oldest first."""
+        return self[max(self._size - n, 0):]
+
+
+class ColumnarRingBuffer:
+    """Fixed-capacity float64 table stored column-wise, with O(1) append and O(1) tail views.
+
+    Every row is written twice, at its slot and at slot + capacity, so the latest
+    n rows are always one contiguous slice. Views returned by `last` and `column`
+    are read-only and share memory with the buffer: once capacity is reached,
+    the oldest rows of a view are overwritten by later appends.
+    """
+
+    def __init__(self, columns: Sequence[str], capacity: int):
+        self._columns = tuple(columns)
+        self._column_index = {column: i for i, column in enumerate(self._columns)}
+        self._capacity = capacity
+        self._data = np.zeros((len(self._columns), 2 * capacity), dtype=np.float64)
+        self._head = 0  # Next write slot
+        self._size = 0
+
+    @property
+    def columns(self):
+        return self._columns
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def __len__(self):
+        return self._size
+
+    def _end(self):
+        """Exclusive end of the latest rows in the mirrored half."""
+        return (self._head - 1) % self._capacity + self._capacity + 1
+
+    def append(self, row: Sequence[float]):
+        self._data[:, self._head] = row
+        self._data[:, self._head + self._capacity] = row
+        self._head = (self._head + 1) % self._capacity
+        if self._size < self._capacity:
+            self._size += 1
+
+    def update_last(self, row: Sequence[float]):
+        """Overwrite the latest row, e.g. a candle still being built."""
+        if self._size < 1:
+            self.append(row)
+            return
+        slot = (self._head - 1) % self._capacity
+        self._data[:, slot] = row
+        self._data[:, slot + self._capacity] = row
+
+    def last(self, n: int = None):
+        """Read-only (columns, n) view of the latest n rows, oldest first."""
+        n = self._size if n is None else min(n, self._size)
+        end = self._end()
+        view = self._data[:, end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def column(self, name: str, n: int = None):
+        """Read-only view of the latest n values of a column, oldest first."""
+        return self.last(n)[self._column_index[name]]
+
+    def _make(self, row):
+        """Build the object yielded for a row, subclasses return entities."""
+        return tuple(row)
+
+    def __getitem__(self, i: int):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError('ColumnarRingBuffer index out of range')
+        return self._make(self.last()[:, i].tolist())
+
+    def __iter__(self):
+        for row in self.last().T.tolist():
+            yield self._make(row)
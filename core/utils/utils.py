@@ -20,4 +20,14 @@ def time_out(func):
                 return await asyncio.create_task(asyncio.wait_for((func(*args, **kwargs)), timeout=global_settings.TIME_OUT_PROCESS))
             except asyncio.TimeoutError:
                 return None
-        return wrapper
\ No newline at end of file
+        return wrapper
+
+async def gather_bounded(coroutines, limit: int = None):
+    """Await coroutines concurrently, at most `limit` at a time.
+       Results keep the input order, a failed coroutine returns its exception in place."""
+    semaphore = asyncio.Semaphore(limit or global_settings.MAX_CONCURRENT_REQUESTS)
+
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+    return await asyncio.gather(*[bounded(c) for c in coroutines], return_exceptions=True)
@@ -3,7 +3,7 @@ import logging
 TIME_OUT = 5   # REQUEST TIME OUT, IN SECONDS
 RETRY_NUM = 3  # REQUEST RETRY TIME IF FAIL
 MAX_NUM_THREADS = 8
-LOOP_INTERVAL = 2 # NUMBER OF LOOP PER SECOND
+LOOP_INTERVAL = 2 # INITIAL LOOP INTERVAL IN SECONDS, ADAPTED BETWEEN LOOP_INTERVAL_MIN AND LOOP_INTERVAL_MAX
 TIME_OUT_PROCESS = 2
 CLIENT_ORDER_PREFIX = 'meld_'
 DEFAULT_MAX_PROCESSES = 8
@@ -11,3 +11,33 @@ LOG_LEVEL = logging.DEBUG
 DEBUG_MODE_ENABLED = False
 DATA_MAX_LENGTH = 5000
 BUFFER_ORDER_QUANTITY = 1.01
+WS_ENABLED = True # USE WEBSOCKET STREAMS WHEN THE EXCHANGE SUPPORTS THEM
+WS_HEARTBEAT = 15 # WEBSOCKET PING INTERVAL, IN SECONDS
+WS_RECONNECT_INTERVAL = 1 # INITIAL WEBSOCKET RECONNECT DELAY, IN SECONDS
+WS_MAX_RECONNECT_INTERVAL = 30 # MAXIMUM WEBSOCKET RECONNECT DELAY, IN SECONDS
+CANDLE_PERIODS = ('M1', 'M5', 'M15', 'H1') # CANDLE PERIODS BUILT LOCALLY FOR EACH PAIR
+CANDLE_BACKFILL_LIMIT = 500 # NUMBER OF CANDLES FETCHED PER PERIOD AT STARTUP
+REFRESH_INTERVALS = {'orderbook': 0.25, 'ticker': 1, 'orders': 1, 'inventory': 5} # POLLING INTERVAL PER DATA TYPE, IN SECONDS
+REFRESH_PRIORITIES = {'orderbook': 0, 'orders': 1, 'ticker': 2, 'inventory': 3} # LOWER IS POLLED FIRST
+POLLING_RATE_SHARE = 0.5 # SHARE OF THE CONNECTOR RATE LIMIT USED FOR POLLING, THE REST IS KEPT FOR ORDERS
+MAX_CONCURRENT_REQUESTS = 10 # MAXIMUM IN-FLIGHT REQUESTS WHEN FANNING OUT PER SYMBOL OR PER ORDER
+RETRY_BASE_DELAY = 0.2 # BACKOFF BEFORE THE FIRST RETRY, DOUBLED ON EACH RETRY, IN SECONDS
+RETRY_MAX_DELAY = 5 # MAXIMUM BACKOFF OR RETRY-AFTER HONOURED BEFORE A REQUEST GIVES UP, IN SECONDS
+RETRY_BUDGET = 10 # MAXIMUM RETRIES ACROSS ALL REQUESTS PER LOOP
+HTTP_POOL_LIMIT = 100 # MAXIMUM OPEN HTTP CONNECTIONS SHARED BY ALL EXCHANGES
+HTTP_POOL_LIMIT_PER_HOST = 20 # MAXIMUM OPEN HTTP CONNECTIONS PER HOST
+HTTP_KEEPALIVE_TIMEOUT = 30 # IDLE TIME BEFORE A POOLED CONNECTION IS CLOSED, IN SECONDS
+HTTP_DNS_CACHE_TTL = 300 # DNS CACHE LIFETIME, IN SECONDS
+JSON_DECODER = 'auto' # msgspec, orjson OR json, auto PICKS THE FASTEST ONE INSTALLED
+ORDERBOOK_DEPTH = 20 # ORDERBOOK LEVELS PER SIDE REQUESTED FOR EACH PAIR UNLESS SET IN THE BOT PROFILE, 0 FOR THE FULL BOOK
+WS_TRADING_ENABLED = True # PLACE AND CANCEL ORDERS OVER THE TRADING WEBSOCKET WHEN THE EXCHANGE SUPPORTS IT
+BALANCE_RECONCILE_INTERVAL = 60 # REST BALANCE POLLING INTERVAL WHILE BALANCES ARE STREAMED, IN SECONDS
+QUOTE_PRICE_TOLERANCE = 0.001 # RELATIVE PRICE MOVE BELOW WHICH A RESTING QUOTE IS KEPT, AT LEAST HALF A TICK
+QUOTE_SIZE_TOLERANCE = 0.1 # RELATIVE REMAINING QUANTITY CHANGE BELOW WHICH A RESTING QUOTE IS KEPT
+STRATEGY_WAKEUP_TIMEOUT = 1 # MAXIMUM STRATEGY THREAD SLEEP BETWEEN CHECKS IF NO WAKEUP ARRIVES, IN SECONDS
+PHASE_HISTORY_LENGTH = 100 # ACTION PHASE TRANSITIONS KEPT PER EXCHANGE FOR INSPECTION
+LOOP_INTERVAL_MIN = 0.5 # SHORTEST LOOP INTERVAL WHEN PRICES MOVE FAST, IN SECONDS
+LOOP_INTERVAL_MAX = 5 # LONGEST LOOP INTERVAL WHEN THE MARKET IS QUIET, IN SECONDS
+LOOP_VOLATILE_MOVE = 0.002 # RELATIVE MID PRICE MOVE OVER ONE LOOP THAT HALVES THE LOOP INTERVAL
+LOOP_QUIET_MOVE = 0.0002 # RELATIVE MID PRICE MOVE OVER ONE LOOP BELOW WHICH THE LOOP INTERVAL GROWS
+LOOP_STATS_EVERY = 30 # NUMBER OF LOOPS BETWEEN TWO LOOP TIMING LOGS
@@ -10,7 +10,7 @@ from yaml.loader import SafeLoader
 import global_settings
 from core.entities import Token, Pair, MarketInfo, Account
 from core.exchange import SpotExchange
-from strategies import StrategyBase
+from strategies import StrategyBase, AsyncStrategyBase
 
 exit_event = threading.Event()
 
@@ -78,7 +78,7 @@ class MarketMaker:
                 secret_key = m['account']['secret_key']
                 account = Account(api_key, secret_key)
                 for p in m['pairs']:
-                    pair = Pair(Token(p['base_asset']), Token(p['quote_asset']))
+                    pair = Pair(Token(p['base_asset']), Token(p['quote_asset']), depth=p.get('depth'))
                     pairs.append(pair)
                 market_info = MarketInfo(exchange_name,pairs,account)
                 market_infos.append(market_info)
@@ -92,7 +92,11 @@ class MarketMaker:
 
     async def _run(self):
         task_run_exchange_base = asyncio.create_task(self.exchange_base.run())
-        await asyncio.gather(task_run_exchange_base, self.executor(self.strategy.run))
+        if isinstance(self.strategy, AsyncStrategyBase):
+            # Awaited by the exchange loop itself
+            await task_run_exchange_base
+        else:
+            await asyncio.gather(task_run_exchange_base, self.executor(self.strategy.run))
 
     def run(self):
         _ProactorBasePipeTransport.__del__ = silence_event_loop_closed(_ProactorBasePipeTransport.__del__)
@@ -1,14 +1,14 @@
 from typing import List
-import time
 
-from core.entities import SpotOrder, OrderBook, PriceCandles, TradeSide, OrderType
-from core.exchange import SpotExchange
-from strategies import StrategyBase
+import global_settings
+from core.exchange import SpotExchange, MarketSnapshot
+from core.utils import setup_custom_logger
+from strategies import AsyncStrategyBase
 
-class StrategyCls(StrategyBase):
+class StrategyCls(AsyncStrategyBase):
     def __init__(self, exchange_bases: List[SpotExchange]):
         super().__init__(exchange_bases)
+        self.logger = setup_custom_logger(__name__, log_level=global_settings.LOG_LEVEL)
 
-    def _run(self):
-        print(self.exchange_base.inventory.get_current_balances)
-        
\ No newline at end of file
+    async def on_tick(self, snapshot: MarketSnapshot):
+        self.logger.debug(f'Balances on {snapshot.exchange.exchange_name}: {snapshot.balances}')
@@ -1,5 +1,6 @@
-from strategies.strategy import StrategyBase
+from strategies.strategy import StrategyBase, AsyncStrategyBase
 
 __all__ = [
-    'StrategyBase'
+    'StrategyBase',
+    'AsyncStrategyBase'
 ]
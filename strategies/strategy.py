@@ -1,14 +1,19 @@
 from abc import ABCMeta, abstractmethod
 import importlib
 import logging
+import threading
 from typing import List
 
-from core.exchange import SpotExchange, ProcessingStatus, BasicStatus
+from core.exchange import SpotExchange, ProcessingStatus, BasicStatus, MarketSnapshot
+import global_settings
 
 
 class StrategyBase(metaclass=ABCMeta):
     def __init__(self, exchange_bases: List[SpotExchange]):
         self.exchange_bases = exchange_bases
+        self._wakeup = threading.Event()
+        for exchange_base in self.exchange_bases:
+            exchange_base.register_strategy_wakeup(self._wakeup)
         if len(self.exchange_bases) < 2:
             self.exchange_base: SpotExchange = exchange_bases[0]
 
@@ -31,6 +36,9 @@ class StrategyBase(metaclass=ABCMeta):
         logging.basicConfig(filename='orders.log', filemode='a', level=logging.INFO,
                             format='%(asctime)s %(name)s - %(levelname)s - %(message)s')
         while all([exchange_base.EXCHANGE_ENABLED for exchange_base in self.exchange_bases]):
+            # Sleep until an exchange has fresh data or stops, the timeout only guards against a missed wakeup
+            self._wakeup.wait(global_settings.STRATEGY_WAKEUP_TIMEOUT)
+            self._wakeup.clear()
             strategy_ready = [exchange_base.READY_FOR_STRATEGY == BasicStatus.READY for exchange_base in self.exchange_bases]
             if all(strategy_ready):
                 self._run()
@@ -40,4 +48,29 @@ class StrategyBase(metaclass=ABCMeta):
 
     @abstractmethod
     def _run(self):
-        pass
\ No newline at end of file
+        pass
+
+
+class AsyncStrategyBase(metaclass=ABCMeta):
+    """Strategy awaited by the exchange event loop once per tick, without a thread.
+
+    on_tick runs between the data refresh and order submission of each loop and
+    sees a consistent state. Keep it light, a CPU heavy strategy blocks the loop
+    and belongs on the thread based StrategyBase.
+    """
+
+    def __init__(self, exchange_bases: List[SpotExchange]):
+        self.exchange_bases = exchange_bases
+        if len(self.exchange_bases) < 2:
+            self.exchange_base: SpotExchange = exchange_bases[0]
+        for exchange_base in self.exchange_bases:
+            exchange_base.register_async_strategy(self)
+
+    @abstractmethod
+    async def on_tick(self, snapshot: MarketSnapshot):
+        """Quote from a snapshot, called once per loop of each exchange.
+        Args:
+            snapshot (MarketSnapshot): state of the exchange that ticked, orders are placed with
+                snapshot.exchange.quote or create_spot_orders.
+        """
+        pass
@@ -0,0 +1,61 @@
+import asyncio
+
+import global_settings
+from core.entities import Account, MarketInfo, Pair, Token
+from core.exchange import SpotExchange
+from core.exchange.exchange_base import MarketStatus
+
+TS = '2023-01-01T00:00:00.000Z'
+CANDLE = {'timestamp': TS, 'open': '1.0', 'max': '1.1', 'min': '0.9', 'close': '1.05', 'volume': '10'}
+TICKER = {'timestamp': TS, 'open': '1.0', 'high': '1.1', 'low': '0.9', 'last': '1.05',
+          'ask': '1.06', 'bid': '1.04', 'volume': '10'}
+
+
+def _exchange(monkeypatch, responses):
+    monkeypatch.setattr(global_settings, 'WS_ENABLED', False)
+    pair = Pair(Token('MELD'), Token('USDT'))
+    exchange = SpotExchange(MarketInfo('FMFW', [pair], Account('key', 'secret')))
+    requests = []
+
+    async def curl(path, auth=False, verb=None, query=None, post_dict=None, attribute=None, response_type=None):
+        requests.append((path, query))
+        return responses.get(path)
+    exchange._connector._curl = curl
+    return exchange, pair, requests
+
+
+def _market_responses():
+    return {'/api/3/spot/balance': [{'currency': 'MELD', 'available': '100'},
+                                    {'currency': 'USDT', 'available': '50'}],
+            '/api/3/public/orderbook': {'MELDUSDT': {'timestamp': TS, 'bid': [['1.04', '5']], 'ask': [['1.06', '5']]}},
+            '/api/3/public/candles': {'MELDUSDT': [CANDLE]},
+            '/api/3/public/ticker': {'MELDUSDT': TICKER},
+            '/api/3/spot/order': []}
+
+
+def test_startup_fetch_reaches_market_ready(monkeypatch):
+    exchange, pair, requests = _exchange(monkeypatch, _market_responses())
+    assert asyncio.run(exchange._fetch_data_process()) is True
+    assert exchange.MARKET_READY == MarketStatus.READY
+    assert pair.current_ticker.close == 1.05
+    assert pair.current_orderbook.get_best_bid == 1.04
+    assert exchange.inventory.get_single_balance('USDT') == 50
+    assert ('/api/3/public/ticker', {'symbols': 'MELDUSDT'}) in requests
+
+
+def test_startup_fetch_retries_on_failed_request(monkeypatch):
+    responses = _market_responses()
+    responses['/api/3/public/ticker'] = None
+    responses['/api/3/spot/balance'] = None
+    exchange, pair, requests = _exchange(monkeypatch, responses)
+    assert asyncio.run(exchange._fetch_data_process()) is False
+    assert exchange.MARKET_READY != MarketStatus.READY
+
+
+def test_polled_candles_and_tickers(monkeypatch):
+    exchange, pair, requests = _exchange(monkeypatch, _market_responses())
+    connector = exchange._connector
+    tickers = asyncio.run(connector.get_tickers())
+    candles = asyncio.run(connector.get_trading_candles('M1'))
+    assert tickers['MELDUSDT'].close == 1.05
+    assert candles['MELDUSDT'].close == 1.05
@@ -0,0 +1,28 @@
+import time
+
+import pytest
+
+from core.exchange.connector.FMFW_connector import convert_timestamp
+
+
+@pytest.fixture
+def non_utc_host(monkeypatch):
+    if not hasattr(time, 'tzset'):
+        pytest.skip('time zone cannot be changed on this platform')
+    monkeypatch.setenv('TZ', 'Asia/Ho_Chi_Minh')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_convert_timestamp_reads_utc(non_utc_host):
+    assert time.timezone != 0
+    assert convert_timestamp('2023-01-01T00:00:00.000Z') == 1672531200
+    assert convert_timestamp('2023-01-01T00:01:30.456Z') == 1672531290
+
+
+def test_convert_timestamp_matches_streamed_epoch(non_utc_host):
+    # Streamed trades carry UTC epoch milliseconds, both must land in the same candle bucket
+    streamed = 1672531230123 / 1000
+    assert convert_timestamp('2023-01-01T00:00:30.123Z') // 60 == streamed // 60
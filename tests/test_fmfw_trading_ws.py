@@ -0,0 +1,172 @@
+import asyncio
+import json
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import global_settings
+from core.entities import SpotOrder, Pair, Token, TradeSide, OrderType, OrderStatus
+from core.exchange.connector.FMFW_connector import FMFWConnector
+
+
+def _report(params: dict, status: str):
+    return {'client_order_id': params.get('new_client_order_id', params['client_order_id']),
+            'symbol': 'MELDUSDT', 'side': 'buy', 'status': status, 'type': 'limit',
+            'quantity': params.get('quantity', '1'), 'price': params.get('price', '1'), 'quantity_cumulative': '0',
+            'created_at': '2023-01-01T00:00:00.000Z', 'updated_at': '2023-01-01T00:00:01.000Z'}
+
+
+class FakeTradingServer:
+    """Stand-in for the FMFW trading websocket, answering JSON-RPC requests by id."""
+
+    def __init__(self, api_key: str = 'key'):
+        self.api_key = api_key
+        self.requests = []
+        self.silent = set()  # client order ids never answered
+        self.delayed = set()  # client order ids answered after the next request
+        self.statuses = {}  # client order id to the status reported when placed
+        self.open_orders = []  # orders placed, listed by the REST open orders endpoint
+
+    async def active(self, request):
+        return web.json_response(self.open_orders)
+
+    async def handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        held = []
+        async for msg in ws:
+            message = json.loads(msg.data)
+            self.requests.append(message)
+            method, params, request_id = message['method'], message['params'], message['id']
+            if method == 'login':
+                response = {'result': params['api_key'] == self.api_key}
+            elif method in ('spot_subscribe', 'spot_balance_subscribe'):
+                response = {'result': True}
+            elif params.get('client_order_id') in self.silent:
+                if method == 'spot_new_order':
+                    self.open_orders.append(_report(params, 'new'))
+                continue
+            elif method == 'spot_new_order':
+                response = {'result': _report(params, self.statuses.get(params['client_order_id'], 'new'))}
+            elif method == 'spot_replace_order':
+                response = {'result': _report(params, 'new')}
+            elif method == 'spot_cancel_order':
+                response = {'result': _report(params, 'canceled')}
+            else:
+                response = {'error': {'code': 1001, 'message': 'Unknown method'}}
+            response.update({'jsonrpc': '2.0', 'id': request_id})
+            if params.get('client_order_id') in self.delayed:
+                held.append(response)
+                continue
+            # A notification in between must not be taken for a response
+            await ws.send_json({'jsonrpc': '2.0', 'method': 'spot_order', 'params': _report({'client_order_id': 'other'}, 'new')})
+            await ws.send_json(response)
+            while held:
+                await ws.send_json(held.pop())
+        return ws
+
+
+def _run(test, api_key: str = 'key'):
+    async def main():
+        server = FakeTradingServer()
+        app = web.Application()
+        app.router.add_get('/ws', server.handler)
+        app.router.add_get('/api/3/spot/order', server.active)
+        test_server = TestServer(app)
+        await test_server.start_server()
+        connector = FMFWConnector()
+        connector._api_endpoint = str(test_server.make_url('')).rstrip('/')
+        connector._ws_trading_endpoint = str(test_server.make_url('/ws'))
+        connector._api_key = api_key
+        connector._secret_key = 'secret'
+        pair = Pair(Token('MELD'), Token('USDT'))
+        pair.tick_size = 0.0001
+        pair.quantity_increment = 1
+        connector._pairs = (pair,)
+        connector._trading_pairs = ('MELDUSDT',)
+        try:
+            async with connector.transport:
+                stream = asyncio.create_task(connector.run_trading_stream())
+                for _ in range(100):
+                    if connector.trading_stream_ready:
+                        break
+                    await asyncio.sleep(0.01)
+                try:
+                    return await test(server, connector, pair)
+                finally:
+                    stream.cancel()
+        finally:
+            await test_server.close()
+    return asyncio.run(main())
+
+
+def _order(pair: Pair, order_id: str, price: float = 1.):
+    return SpotOrder(1, price, TradeSide.BUY, OrderType.LIMIT, pair, OrderStatus.NEW, order_id)
+
+
+def test_login_and_subscriptions():
+    async def test(server, connector, pair):
+        assert connector.trading_stream_ready
+        assert [r['method'] for r in server.requests] == ['login', 'spot_subscribe', 'spot_balance_subscribe']
+        assert server.requests[0]['params'] == {'type': 'BASIC', 'api_key': 'key', 'secret_key': 'secret'}
+        assert connector._order_reports_ready
+    _run(test)
+
+
+def test_failed_login_keeps_stream_down():
+    async def test(server, connector, pair):
+        assert not connector.trading_stream_ready
+        assert [r['method'] for r in server.requests][:1] == ['login']
+    _run(test, api_key='wrong')
+
+
+def test_place_replace_cancel():
+    async def test(server, connector, pair):
+        placed = await connector.create_spot_orders([_order(pair, 'a')])
+        assert [(o.order_id, o.status) for o in placed] == [('a', OrderStatus.NEW)]
+
+        old, new = placed[0], _order(pair, 'b', price=1.01234)
+        replaced = await connector.replace_spot_orders([(old, new)])
+        assert replaced == [(old, new)]
+        assert old.status == OrderStatus.CANCELED and new.status == OrderStatus.NEW
+        request = server.requests[-1]
+        assert request['method'] == 'spot_replace_order'
+        assert request['params'] == {'client_order_id': 'a', 'new_client_order_id': 'b',
+                                     'quantity': '1', 'price': '1.0123'}
+
+        cancelled = await connector.cancel_spot_orders([new])
+        assert [(o.order_id, o.status) for o in cancelled] == [('b', OrderStatus.CANCELED)]
+        assert server.requests[-1]['method'] == 'spot_cancel_order'
+    _run(test)
+
+
+def test_responses_matched_by_id():
+    async def test(server, connector, pair):
+        server.delayed.add('slow')
+        server.statuses['slow'] = 'partiallyFilled'
+        slow, fast = _order(pair, 'slow'), _order(pair, 'fast')
+        placed = await connector.create_spot_orders([slow, fast])
+        assert sorted(o.order_id for o in placed) == ['fast', 'slow']
+        assert slow.status == OrderStatus.PARTIALLY_FILLED
+        assert fast.status == OrderStatus.NEW
+        # slow was sent first but answered last
+        assert [r['params']['client_order_id'] for r in server.requests[-2:]] == ['slow', 'fast']
+        ids = [r['id'] for r in server.requests]
+        assert len(ids) == len(set(ids))
+    _run(test)
+
+
+def test_timeout_returns_none(monkeypatch):
+    monkeypatch.setattr(global_settings, 'TIME_OUT', 0.2)
+
+    async def test(server, connector, pair):
+        server.silent.add('lost')
+        assert await connector._create_spot_order(_order(pair, 'lost')) is None
+        assert connector.trading_stream_ready
+        # The order reached the exchange, it is found among the open orders instead of sent again
+        lost, kept = _order(pair, 'lost'), _order(pair, 'kept')
+        placed = await connector.create_spot_orders([lost, kept])
+        assert [o.order_id for o in placed] == ['kept', 'lost']
+        assert [r['params']['client_order_id'] for r in server.requests if r['method'] == 'spot_new_order'] == \
+            ['lost', 'lost', 'kept']
+    _run(test)
@@ -0,0 +1,92 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import global_settings
+from core.entities import SpotOrder, Pair, Token, TradeSide, OrderType, OrderStatus
+from core.exchange.connector.FMFW_connector import FMFWConnector
+
+
+def _report(client_order_id: str):
+    return {'client_order_id': client_order_id, 'symbol': 'MELDUSDT', 'side': 'buy', 'status': 'new',
+            'type': 'limit', 'quantity': '1', 'price': '1', 'quantity_cumulative': '0',
+            'created_at': '2023-01-01T00:00:00.000Z', 'updated_at': '2023-01-01T00:00:01.000Z'}
+
+
+class SlowRestServer:
+    """FMFW REST stand-in that registers orders but answers order writes too late."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.hits = {}  # (verb, path) to number of requests received
+        self.open_orders = []
+
+    async def place(self, request):
+        self.hits[('POST', request.path)] = self.hits.get(('POST', request.path), 0) + 1
+        data = await request.post()
+        self.open_orders.append(_report(data['client_order_id']))
+        await asyncio.sleep(self.delay)
+        return web.json_response(self.open_orders[-1])
+
+    async def active(self, request):
+        self.hits[('GET', request.path)] = self.hits.get(('GET', request.path), 0) + 1
+        return web.json_response(self.open_orders)
+
+    async def slow_get(self, request):
+        self.hits[('GET', request.path)] = self.hits.get(('GET', request.path), 0) + 1
+        await asyncio.sleep(self.delay)
+        return web.json_response([])
+
+
+def _run(test, monkeypatch):
+    monkeypatch.setattr(global_settings, 'TIME_OUT_PROCESS', 0.2)
+    monkeypatch.setattr(global_settings, 'RETRY_BASE_DELAY', 0.01)
+
+    async def main():
+        server = SlowRestServer(delay=0.5)
+        app = web.Application()
+        app.router.add_post('/api/3/spot/order', server.place)
+        app.router.add_get('/api/3/spot/order', server.active)
+        app.router.add_get('/api/3/public/ticker', server.slow_get)
+        test_server = TestServer(app)
+        await test_server.start_server()
+        connector = FMFWConnector()
+        connector._api_endpoint = str(test_server.make_url('')).rstrip('/')
+        pair = Pair(Token('MELD'), Token('USDT'))
+        pair.tick_size = 0.0001
+        pair.quantity_increment = 1
+        connector._pairs = (pair,)
+        connector._trading_pairs = ('MELDUSDT',)
+        try:
+            async with connector.transport:
+                return await test(server, connector, pair)
+        finally:
+            await test_server.close()
+    return asyncio.run(main())
+
+
+def test_timed_out_order_write_is_not_sent_again(monkeypatch):
+    async def test(server, connector, pair):
+        spot_order = SpotOrder(1, 1, TradeSide.BUY, OrderType.LIMIT, pair, OrderStatus.NEW, 'late')
+        assert await connector._create_spot_order(spot_order) is None
+        assert server.hits[('POST', '/api/3/spot/order')] == 1
+    _run(test, monkeypatch)
+
+
+def test_timed_out_create_is_found_by_client_order_id(monkeypatch):
+    async def test(server, connector, pair):
+        spot_order = SpotOrder(1, 1, TradeSide.BUY, OrderType.LIMIT, pair, OrderStatus.NEW, 'late')
+        created = await connector.create_spot_orders([spot_order])
+        assert created == [spot_order]
+        assert spot_order.status == OrderStatus.NEW
+        assert server.hits[('POST', '/api/3/spot/order')] == 1
+        assert server.hits[('GET', '/api/3/spot/order')] == 1
+    _run(test, monkeypatch)
+
+
+def test_timed_out_get_is_retried(monkeypatch):
+    async def test(server, connector, pair):
+        assert await connector._curl('/api/3/public/ticker') is None
+        assert server.hits[('GET', '/api/3/public/ticker')] == global_settings.RETRY_NUM + 1
+    _run(test, monkeypatch)